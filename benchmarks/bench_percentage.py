@@ -0,0 +1,58 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from dashboard.cleaning import fix_columns_with_percentage
+
+# PRESETS AND CONSTANTS
+ROWS = 100_000
+COLUMNS = 29
+
+
+# REFERENCE: THE PER-ELEMENT PARSER THE PAGES USED BEFORE
+def fix_columns_with_percentage_legacy(series):
+    series = (series.astype(str)
+              .apply(lambda x: float(x.replace("%", ""))/100 
+                    if x.endswith("%")
+                    else float(x)/100
+                    if float(x)>1
+                    else float(x)
+                    )
+            )
+    return series
+
+def make_frame(rows, columns, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        ratio = rng.uniform(0, 1, rows)
+        kind = rng.integers(0, 4, rows)
+        text = np.where(kind == 0, np.char.add((ratio * 100).round(2).astype(str), "%"),
+                        np.where(kind == 1, (ratio * 100).round(2).astype(str), ratio.round(4).astype(str)))
+        column = pd.Series(text, dtype=object)
+        column[kind == 3] = np.nan
+        data[f"KPI {i} (%)"] = column
+    return pd.DataFrame(data)
+
+def main():
+    df = make_frame(ROWS, COLUMNS)
+
+    start = time.perf_counter()
+    expected = pd.DataFrame({col: fix_columns_with_percentage_legacy(df[col]) for col in df.columns})
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = fix_columns_with_percentage(df)
+    vectorized_time = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+    print(f"{ROWS} rows x {COLUMNS} columns, outputs are equal")
+    print(f"legacy:     {legacy_time:.3f}s")
+    print(f"vectorized: {vectorized_time:.3f}s ({legacy_time / vectorized_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
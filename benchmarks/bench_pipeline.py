@@ -0,0 +1,135 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from benchmarks.generate_data import TECHNOLOGIES, generate
+from dashboard.charts import kpi_figure
+from dashboard.cleaning import (clean_frame, clean_used_columns, fix_columns_with_percentage, fix_date_columns,
+                                replace_null_tokens)
+from dashboard.cube import GRANULARITIES
+from dashboard.dataset import load_dataset
+from dashboard.filters import build_option_index, cascade_options
+from dashboard.ingest import read_source
+from dashboard.kpi import derive
+from dashboard.schema import build_schema
+
+# PRESETS AND CONSTANTS
+SIZES = (10_000, 1_000_000, 10_000_000)
+# EVERY WAY load_dataset CAN SERVE THE ROWS; EACH MUST GIVE THE SAME KPI TABLES AS "pandas"
+BACKENDS = {"pandas": {}, "compact": {"compact": True}, "mmap": {"memory_map": True}, "sqlite": {"backend": "sqlite"}}
+
+
+def timed(results, stage, func, *args, **kwargs):
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    results[stage] = time.perf_counter() - start
+    return value
+
+def bench_cleaning(results, raw, tech):
+    # THE STEPS OF clean_frame ONE BY ONE, THEN clean_frame AS A WHOLE
+    schema = build_schema(tech)
+    df_ = raw[list(schema.columns)].copy()
+    df_ = timed(results, "clean: null tokens", replace_null_tokens, df_, tech)
+    percentage_columns = list(schema.percentage_columns)
+    if percentage_columns:
+        timed(results, "clean: percentages", fix_columns_with_percentage, df_[percentage_columns])
+    timed(results, "clean: dates", lambda: [fix_date_columns(df_[col]) for col in schema.date_columns])
+    timed(results, "clean: numeric", lambda: [clean_used_columns(df_[col]) for col in schema.numeric_columns])
+    timed(results, "clean: categories", lambda: [df_[col].astype("category") for col in schema.filter_columns])
+    timed(results, "clean_frame", clean_frame, raw, tech)
+
+def bench_selections(dataset):
+    # NO FILTER, ONE DIMENSION-LEVEL SELECTION (CUBE) AND ONE CELL-LEVEL SELECTION (RAW ROWS)
+    df_ = dataset.frame
+    regional = df_["REGIONAL"].cat.categories[:2].tolist()
+    cells = df_[dataset.tech.cell_column].cat.categories
+    cells = cells[::max(1, len(cells) // 20)].tolist()
+    return {"all": {}, "regional": {"REGIONAL": regional}, "cells": {dataset.tech.cell_column: cells}}
+
+def kpi_tables(dataset, selections, granularity="D"):
+    # WHAT THE PAGE CHARTS FOR selections OVER THE WHOLE DATE RANGE, {} WHEN NO ROW MATCHES
+    start, end = dataset.date_range()
+    table = dataset.query(start, end, selections, granularity)
+    return derive(table, dataset.kpis) if len(table.index) else {}
+
+def check_tables(expected, actual, label):
+    # RAISES AssertionError WHEN THE TABLES DIFFER. SUMS ARE TAKEN IN A DIFFERENT ORDER (SQLITE) OR IN float32
+    # (compact), SO VALUES ARE COMPARED TO pandas' DEFAULT RELATIVE TOLERANCE, EVERYTHING ELSE EXACTLY
+    if list(expected) != list(actual):
+        raise AssertionError(f"{label}: KPIs {list(actual)} instead of {list(expected)}")
+    for key in expected:
+        pd.testing.assert_frame_equal(actual[key], expected[key], check_dtype=False, check_categorical=False,
+                                      obj=f"{label}: {key}")
+
+def check_backends(datasets, selections):
+    # EVERY BACKEND AGAINST THE FIRST ONE, FOR EVERY SELECTION AND GRANULARITY
+    (reference, expected_dataset), *others = datasets.items()
+    for label, selection in selections.items():
+        for freq in GRANULARITIES.values():
+            expected = kpi_tables(expected_dataset, selection, freq)
+            for name, dataset in others:
+                check_tables(expected, kpi_tables(dataset, selection, freq), f"{name} vs {reference}, {label}, {freq}")
+
+def bench_page(results, dataset):
+    tech = dataset.tech
+    df_ = dataset.frame
+    start, end = df_[tech.date_columns[0]].min(), df_[tech.date_columns[0]].max()
+    option_index = timed(results, "create_filter_list", build_option_index, df_, tech.filter_columns)
+
+    for label, selections in bench_selections(dataset).items():
+        if not selections:
+            continue
+        timed(results, f"cascade options ({label})", cascade_options, option_index, selections)
+        table = timed(results, f"query ({label})", dataset.query, start, end, selections)
+        tables = timed(results, f"derive ({label})", derive, table, dataset.kpis)
+        timed(results, f"figures ({label})", lambda: [kpi_figure(kpi, tables[kpi.key]) for kpi in dataset.kpis])
+
+def bench(tech, rows, data_dir, seed=0):
+    results = {}
+    path = Path(data_dir) / f"{tech.name}-{rows}.csv"
+    if not path.exists():
+        timed(results, "generate (not part of the page)", generate, tech, rows, path, seed=seed)
+    raw = timed(results, "read_source", read_source, path, tech)
+    bench_cleaning(results, raw, tech)
+    del raw
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # import_files: A COLD LOAD BUILDS AND STORES THE FRAME AND CUBE, A WARM ONE READS THE STORE. EACH
+        # BACKEND HAS ITS OWN STORE, THE OTHERS ARE LOADED COLD ONLY TO CHECK THEIR OUTPUT
+        datasets = {}
+        for name, options in BACKENDS.items():
+            store = Path(cache_dir) / name
+            datasets[name] = timed(results, f"import_files ({name}, cold)", load_dataset, tech, str(path),
+                                   cache_dir=store, **options)
+            if name == "pandas":
+                datasets[name] = timed(results, "import_files (warm)", load_dataset, tech, str(path), cache_dir=store)
+        dataset = datasets["pandas"]
+        bench_page(results, dataset)
+        # FAILS THE RUN WHEN A BACKEND'S OUTPUT DIFFERS, A FAST WRONG ANSWER IS NOT A RESULT
+        timed(results, "check backends", check_backends, datasets, bench_selections(dataset))
+    return len(dataset.frame), results
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of the 2G/4G dashboard pipeline.")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--tech", nargs="+", default=list(TECHNOLOGIES), choices=list(TECHNOLOGIES))
+    parser.add_argument("--data", default=None, help="directory for the generated CSVs, reused between runs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(args.data or tmp_dir)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        for name in args.tech:
+            for rows in args.rows:
+                kept, results = bench(TECHNOLOGIES[name], rows, data_dir, args.seed)
+                print(f"\n{name}, {rows:,} rows ({kept:,} after cleaning)")
+                for stage, seconds in results.items():
+                    print(f"  {stage:<34} {seconds:9.3f}s")
+
+if __name__ == "__main__":
+    main()
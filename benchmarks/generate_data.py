@@ -0,0 +1,152 @@
+import argparse
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from dashboard.kpi import required_columns
+from dashboard.registry import KPIS
+from dashboard.technology import TECH_2G, TECH_4G
+
+# PRESETS AND CONSTANTS
+TECHNOLOGIES = {"2G": TECH_2G, "4G": TECH_4G}
+DAYS = 365
+FIRST_SERIAL = 44927  # 2023-01-01 AS AN EXCEL SERIAL DAY
+CHUNK_ROWS = 250_000
+# SHARE OF CELLS REPLACED BY EACH NULL TOKEN (WHITESPACE ONLY WHERE THE TECHNOLOGY TREATS IT AS NULL),
+# AND OF PERCENTAGES WRITTEN AS "12.5%" / "12.5" / 0.125
+DIRT = {"NIL": 0.01, "#N/A": 0.005, "0x2a": 0.003, "": 0.01, "  ": 0.002}
+PERCENT_STYLES = (0.4, 0.3, 0.3)
+# COLUMNS OF THE EXPORT THAT NO CHART OR FILTER READS
+UNUSED_COLUMNS = ("Granularity", "Reliability", "Integrity", "Site ID", "Longitude", "Latitude")
+DIMENSION_SIZES = {"Vendor LC": 4, "Vendor GS": 3, "Cluster": 40, "SUBNETWORK Name": 12, "Subnetwork Name": 12,
+                   "Spotbeam": 20, "PROJECT": 6, "TECHNOLOGY COLO": 3, "BTS VENDOR": 3, "REGIONAL": 5, "DESA": 800}
+
+
+def _denominator(col, columns):
+    # "Num X" -> "Denum X", "X Num" -> "X Denum", "X NUM" -> "X DENUM"
+    for num, denum in (("Num ", "Denum "), (" Num", " Denum"), (" NUM", " DENUM")):
+        if num in col:
+            candidate = col.replace(num, denum, 1)
+            if candidate in columns:
+                return candidate
+    return None
+
+def schema_columns(tech):
+    # EVERY COLUMN THE PAGES READ, PLUS A FEW THE EXPORT CARRIES THAT NOTHING USES
+    sums, means, counts, breakdowns = required_columns(KPIS[tech.name])
+    columns = [*tech.date_columns, *tech.filter_columns, *tech.percentage_columns, *tech.chart_columns,
+               *sums, *means, *counts, *breakdowns, *UNUSED_COLUMNS]
+    return list(dict.fromkeys(columns))
+
+def cell_dimensions(tech, cells, rng):
+    # EACH CELL KEEPS ITS DIMENSIONS FOR THE WHOLE YEAR, DESA AND Cluster NEST IN REGIONAL
+    regional = rng.integers(0, DIMENSION_SIZES["REGIONAL"], cells)
+    dims = {tech.cell_column: np.array([f"SITE{i // 3:06d}_{i % 3 + 1}" for i in range(cells)], dtype=object)}
+    for col in tech.filter_columns:
+        if col == tech.cell_column:
+            continue
+        if col == "Days per Week":
+            dims[col] = np.where(rng.random(cells) < 0.8, 7, 5)
+            continue
+        size = DIMENSION_SIZES.get(col, 5)
+        if col in ("Cluster", "DESA"):
+            codes = regional * size + rng.integers(0, size, cells)
+        elif col == "REGIONAL":
+            codes = regional
+        else:
+            codes = rng.integers(0, size, cells)
+        dims[col] = np.array([f"{col.split()[0].upper()}_{code}" for code in codes], dtype=object)
+    dims["PROJECT"] = np.where(rng.random(cells) < 0.05, None, dims["PROJECT"])
+    return dims
+
+def _dirty(values, rng, dirt):
+    # VALUES AS WRITTEN BY THE EXPORT, WITH NULL TOKENS MIXED IN
+    column = pd.Series(values).astype(object)
+    draw = rng.random(len(column))
+    low = 0.0
+    for token, share in dirt.items():
+        column[(draw >= low) & (draw < low + share)] = token
+        low += share
+    return column
+
+def _percentage(ratio, rng, dirt):
+    style = rng.choice(3, size=len(ratio), p=PERCENT_STYLES)
+    text = pd.Series((ratio * 100).round(2)).astype(str)
+    text[style == 0] = text[style == 0] + "%"
+    text[style == 2] = pd.Series(ratio.round(4)).astype(str)[style == 2]
+    return _dirty(text.to_numpy(dtype=object), rng, dirt)
+
+def generate_chunk(tech, dims, day_start, day_stop, rng, columns):
+    cells = len(dims[tech.cell_column])
+    days = np.repeat(np.arange(day_start, day_stop), cells)
+    rows = len(days)
+    cell = np.tile(np.arange(cells), day_stop - day_start)
+    dirt = {token: share for token, share in DIRT.items() if token.strip() or not token or tech.null_blank}
+    frame = {}
+    # EXCEL SERIAL DATES, END TIME CARRIES THE TIME OF DAY AS A FRACTION
+    start = (FIRST_SERIAL + days).astype(object)
+    start[rng.random(rows) < 0.0005] = ""
+    frame[tech.date_columns[0]] = start
+    for col in tech.date_columns[1:]:
+        frame[col] = (FIRST_SERIAL + days + 0.99931).round(5)
+    for col in tech.filter_columns:
+        frame[col] = dims[col][cell]
+    for col in columns:
+        if col in frame:
+            continue
+        if col in tech.percentage_columns:
+            frame[col] = _percentage(rng.beta(20, 1, rows), rng, dirt)
+        elif col in UNUSED_COLUMNS:
+            frame[col] = rng.normal(0, 1, rows).round(6)
+        elif col == "ManagedElement":
+            frame[col] = np.array([f"ME{i // 3:06d}" for i in range(cells)], dtype=object)[cell]
+        elif "DENUM" in col.upper() or "Number of sent" in col:
+            frame[col] = _dirty(rng.poisson(2000, rows), rng, dirt)
+        else:
+            frame[col] = _dirty(rng.gamma(2.0, 50.0, rows).round(2), rng, dirt)
+    # NUMERATORS NEVER EXCEED THEIR DENOMINATORS
+    for col in columns:
+        denum = _denominator(col, columns)
+        if denum is not None:
+            base = pd.to_numeric(frame[denum], errors="coerce").to_numpy()
+            frame[col] = _dirty(np.floor(base * rng.beta(30, 1, rows)), rng, dirt)
+    if "Number of replies received in the watch time" in columns:
+        sent = pd.to_numeric(frame["Number of sent path-detection request packets"], errors="coerce").to_numpy()
+        frame["Number of replies received in the watch time"] = _dirty(np.floor(sent * rng.beta(50, 1, rows)), rng, dirt)
+    return pd.DataFrame(frame, columns=columns)
+
+def generate(tech, rows, path, days=DAYS, seed=0):
+    # rows IS ROUNDED UP TO WHOLE DAYS OF cells, WRITTEN IN DAY ORDER LIKE THE DAILY EXPORT
+    rng = np.random.default_rng(seed)
+    days = min(days, rows)
+    cells = math.ceil(rows / days)
+    columns = schema_columns(tech)
+    dims = cell_dimensions(tech, cells, rng)
+    days_per_chunk = max(1, CHUNK_ROWS // cells)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for day_start in range(0, days, days_per_chunk):
+        day_stop = min(days, day_start + days_per_chunk)
+        chunk = generate_chunk(tech, dims, day_start, day_stop, rng, columns)
+        chunk.to_csv(path, index=False, header=not day_start, mode="a" if day_start else "w")
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic 2G/4G daily exports with the dashboards' schema.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=DAYS)
+    parser.add_argument("--tech", nargs="+", default=list(TECHNOLOGIES), choices=list(TECHNOLOGIES))
+    parser.add_argument("--out", default=".", help="directory that gets data/<export name>.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for name in args.tech:
+        tech = TECHNOLOGIES[name]
+        path = generate(tech, args.rows, Path(args.out) / tech.file_path, args.days, args.seed)
+        print(f"{name}: {path}")
+
+if __name__ == "__main__":
+    main()
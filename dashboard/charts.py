@@ -0,0 +1,84 @@
+from dataclasses import replace
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from dashboard.kpi import DATE_COLUMN
+
+# A FIGURE WITH MORE POINTS THAN THIS IS DRAWN WITH WebGL (Scattergl) INSTEAD OF SVG
+WEBGL_POINTS = 2000
+# LONGER SERIES ARE DOWNSAMPLED TO ABOUT THIS MANY POINTS
+MAX_POINTS = 1000
+SUBPLOT_HEIGHT = 320
+
+
+def kpi_figure(kpi, table, x=DATE_COLUMN):
+    y = kpi.y_columns
+    fig = px.line(table, x=x, y=y[0] if len(y) == 1 else y, title=kpi.title, color=kpi.color, markers=True)
+    return fig
+
+def downsample(x, y, max_points=MAX_POINTS):
+    # KEEPS THE MIN AND MAX OF EACH BUCKET, SO SPIKES AND DROPS SURVIVE THE REDUCTION
+    if len(x) <= max_points:
+        return x, y
+    buckets = max_points // 2
+    edges = np.linspace(0, len(x), buckets + 1).astype(int)
+    keep = []
+    values = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0, y)
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            chunk = values[start:stop]
+            keep.extend(sorted({start + int(np.argmin(chunk)), start + int(np.argmax(chunk))}))
+    keep = np.asarray(keep)
+    return x[keep], y[keep]
+
+def kpi_series(kpi, table, x=DATE_COLUMN):
+    # (name, x, y) PER LINE OF THE CHART: ONE PER y COLUMN, OR ONE PER VALUE OF THE color COLUMN
+    if kpi.color:
+        y = kpi.y_columns[0]
+        return [(str(value), part[x].to_numpy(), part[y].to_numpy(dtype=float))
+                for value, part in table.groupby(kpi.color, sort=True)]
+    return [(col, table[x].to_numpy(), table[col].to_numpy(dtype=float)) for col in kpi.y_columns]
+
+def kpi_grid_figure(kpis, kpi_tables, x=DATE_COLUMN, max_points=MAX_POINTS, webgl_points=WEBGL_POINTS):
+    # EVERY KPI AS A SUBPLOT OF ONE FIGURE, LAID OUT IN THE REGISTRY'S PAGE COLUMNS WITH SHARED x AXES,
+    # SO THE BROWSER GETS ONE PAYLOAD AND ONE RENDER INSTEAD OF ONE PER CHART
+    columns = max(kpi.column for kpi in kpis) + 1
+    stacks = [[kpi for kpi in kpis if kpi.column == col] for col in range(columns)]
+    rows = max(len(stack) for stack in stacks)
+    titles = [stack[row].title if row < len(stack) else "" for row in range(rows) for stack in stacks]
+    fig = make_subplots(rows=rows, cols=columns, shared_xaxes=True, subplot_titles=titles,
+                        vertical_spacing=min(0.3 / rows, 0.08), horizontal_spacing=0.04)
+
+    series = {kpi.key: kpi_series(kpi, kpi_tables[kpi.key], x) for kpi in kpis}
+    points = sum(len(values) for lines in series.values() for _, values, _ in lines)
+    scatter = go.Scattergl if points > webgl_points else go.Scatter
+    palette = px.colors.qualitative.Plotly
+    for col, stack in enumerate(stacks):
+        for row, kpi in enumerate(stack):
+            lines = series[kpi.key]
+            # THE FIGURE HAS ONE LEGEND: THE LINES OF A MULTI-SERIES SUBPLOT ARE LISTED UNDER ITS TITLE (AND TOGGLED
+            # TOGETHER FROM IT), A SINGLE LINE IS ALREADY NAMED BY ITS SUBPLOT TITLE
+            legend = len(lines) > 1
+            for i, (name, xs, ys) in enumerate(lines):
+                xs, ys = downsample(xs, ys, max_points)
+                fig.add_trace(scatter(x=xs, y=ys, name=name, mode="lines+markers", marker={"size": 4},
+                                      line={"color": palette[i % len(palette)]},
+                                      legendgroup=kpi.key, showlegend=legend,
+                                      legendgrouptitle={"text": kpi.title} if legend else None,
+                                      hovertemplate=f"{name}: %{{y}}<extra>{kpi.title}</extra>"),
+                              row=row + 1, col=col + 1)
+    fig.update_layout(height=SUBPLOT_HEIGHT * rows, margin={"t": 40, "b": 20, "l": 20, "r": 20}, hovermode="x",
+                      legend={"tracegroupgap": 12, "groupclick": "toggleitem"})
+    return fig
+
+def kpi_groups(kpis):
+    # ONE GROUP PER PAGE COLUMN OF THE REGISTRY, E.G. FOR TABS THAT ONLY RENDER THE OPEN GROUP
+    columns = max(kpi.column for kpi in kpis) + 1
+    return {f"Column {col + 1}": [kpi for kpi in kpis if kpi.column == col] for col in range(columns)}
+
+def group_grid_figure(kpis, kpi_tables, x=DATE_COLUMN, max_points=MAX_POINTS, webgl_points=WEBGL_POINTS):
+    # A SINGLE COLUMN OF SUBPLOTS FOR ONE GROUP
+    return kpi_grid_figure([replace(kpi, column=0) for kpi in kpis], kpi_tables, x, max_points, webgl_points)
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+from dashboard.instrument import stage
+from dashboard.schema import build_schema
+
+EXCEL_EPOCH = "1899-12-30"
+# WHAT float() ACCEPTS ONCE WHITESPACE AND "%" ARE STRIPPED
+NUMBER_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$|^(?i:[+-]?(inf|infinity|nan))$"
+
+
+def _parse_percentage_text(values):
+    try:
+        text = pa.array(values, type=pa.string(), from_pandas=True)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        text = pa.array(pd.Series(values).astype(str), type=pa.string())
+    text = pc.utf8_trim_whitespace(text)
+    has_pct = pc.fill_null(pc.ends_with(text, "%"), False)
+    text = pc.utf8_trim_whitespace(pc.replace_substring(text, "%", ""))
+    try:
+        numbers = pc.cast(text, pa.float64())
+    except pa.ArrowInvalid:
+        numbers = pc.cast(pc.if_else(pc.match_substring_regex(text, NUMBER_PATTERN), text, None), pa.float64())
+    return has_pct.to_numpy(zero_copy_only=False), numbers.to_numpy(zero_copy_only=False)
+
+def fix_columns_with_percentage(df_):
+    # "12.5%" AND 12.5 BECOME 0.125, 0.125 STAYS, BAD TOKENS BECOME NaN
+    if isinstance(df_, pd.Series):
+        return fix_columns_with_percentage(df_.to_frame()).iloc[:, 0]
+    values = np.empty(df_.shape)
+    has_pct = np.zeros(df_.shape, dtype=bool)
+    numeric = [i for i, dtype in enumerate(df_.dtypes) if is_numeric_dtype(dtype)]
+    text = [i for i in range(df_.shape[1]) if i not in numeric]
+    if numeric:
+        values[:, numeric] = df_.iloc[:, numeric].to_numpy(dtype=float)
+    if text:
+        # ALL TEXT COLUMNS ARE PARSED AS ONE FLAT BATCH
+        batch_pct, batch_values = _parse_percentage_text(df_.iloc[:, text].to_numpy(dtype=object).ravel())
+        has_pct[:, text] = batch_pct.reshape(len(df_), len(text))
+        values[:, text] = batch_values.reshape(len(df_), len(text))
+    values = np.where(has_pct | (values > 1), values / 100, values)
+    return pd.DataFrame(values, index=df_.index, columns=df_.columns)
+
+def fix_date_columns(series):
+    # ALREADY PARSED DATES ARE KEPT AS THEY ARE
+    if is_datetime64_any_dtype(series):
+        return series
+    serials = series if is_numeric_dtype(series) else pd.to_numeric(series, errors="coerce")
+    if serials.notna().sum() < series.notna().sum():
+        # TEXT DATES SUCH AS "31/01/2023"
+        return pd.to_datetime(series, dayfirst=True)
+    # EXCEL SERIAL DAYS, THE FRACTION (TIME OF DAY) IS DROPPED LIKE THE DAILY EXPORT EXPECTS
+    with np.errstate(invalid="ignore"):
+        return pd.to_datetime(np.floor(serials.astype(float)), unit="D", origin=EXCEL_EPOCH)
+
+def _null_text_mask(values, tech):
+    try:
+        text = pa.array(values, type=pa.string(), from_pandas=True)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # MIXED OBJECTS, ONLY THE STRINGS CAN BE TOKENS
+        is_text = np.array([isinstance(value, str) for value in values], dtype=bool)
+        mask = np.zeros(len(values), dtype=bool)
+        mask[is_text] = _null_text_mask(values[is_text], tech)
+        return mask
+    tokens = [token for token in tech.null_tokens if token]
+    mask = pc.is_in(text, value_set=pa.array(list(tech.null_tokens), type=pa.string()))
+    if tech.null_blank:
+        mask = pc.or_(mask, pc.or_(pc.equal(pc.utf8_length(text), 0), pc.utf8_is_space(text)))
+    if tech.null_contains:
+        for token in tokens:
+            mask = pc.or_(mask, pc.match_substring(text, token))
+    return pc.fill_null(mask, False).to_numpy(zero_copy_only=False)
+
+def replace_null_tokens(df_, tech):
+    # EXACT TOKENS ARE USUALLY NaN ALREADY (read_csv na_values), SO ONLY TEXT COLUMNS ARE CHECKED
+    for col in df_.columns:
+        if df_[col].dtype != object:
+            continue
+        mask = _null_text_mask(df_[col].to_numpy(), tech)
+        if mask.any():
+            df_[col] = df_[col].mask(mask)
+    return df_
+
+def clean_used_columns(series):
+    series = series.astype(float)
+    return series
+
+def clean_frame(df, tech):
+    schema = build_schema(tech)
+    # ONLY THE COLUMNS OF THE SCHEMA ARE CLEANED AND KEPT
+    df = df[list(schema.columns)].copy()
+
+    # REPLACE NULL TOKENS wtih np.nan
+    with stage("clean: null tokens"):
+        df = replace_null_tokens(df, tech)
+
+    # FIX COLUMNS WITH PERCENTAGE
+    percentage_columns = list(schema.percentage_columns)
+    if percentage_columns:
+        with stage("clean: percentages"):
+            df[percentage_columns] = fix_columns_with_percentage(df[percentage_columns])
+
+    # FIX COLUMNS WITH DATE
+    with stage("clean: dates"):
+        for col in schema.date_columns:
+            df[col] = fix_date_columns(df[col])
+
+    # FIX COLUMNS NEEDED FOR CHARTS
+    with stage("clean: numeric"):
+        for col in schema.numeric_columns:
+            df[col] = clean_used_columns(df[col])
+
+    # FILTER DIMENSIONS AS CATEGORICALS, ROWS SORTED BY DATE FOR BINARY SEARCH
+    with stage("clean: categories and sort"):
+        for col in schema.filter_columns:
+            df[col] = df[col].astype("category")
+        date_column = schema.date_columns[0]
+        df = df[df[date_column].notna()].sort_values(date_column, kind="stable", ignore_index=True)
+    return df
\ No newline at end of file
@@ -0,0 +1,57 @@
+import io
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_integer_dtype, is_numeric_dtype
+
+from dashboard.schema import build_schema
+
+INT32 = np.iinfo(np.int32)
+
+
+def downcast_numeric(series):
+    # int32 WHEN EVERY VALUE IS A WHOLE NUMBER THAT FITS, OTHERWISE float32 WHEN EVERY VALUE SURVIVES THE ROUND
+    # TRIP EXACTLY (A RANGE CHECK ALONE LETS 123456789.37 COME BACK AS 123456792.0)
+    if not is_numeric_dtype(series) or is_bool_dtype(series):
+        return series
+    values = series.to_numpy(dtype=float)
+    present = values[~np.isnan(values)]
+    if not len(present):
+        return series.astype("float32")
+    low, high = present.min(), present.max()
+    if (len(present) == len(values) and low >= INT32.min and high <= INT32.max
+            and (is_integer_dtype(series) or (np.floor(present) == present).all())):
+        return series.astype("int32")
+    with np.errstate(over="ignore"):
+        if np.array_equal(values.astype(np.float32), values, equal_nan=True):
+            return series.astype("float32")
+    return series
+
+def compact_frame(df_, tech):
+    # SIDEBAR DIMENSIONS AS CATEGORIES, KPI INPUTS DOWNCAST, EVERYTHING ELSE AS IT IS. RUN BY refresh ON THE
+    # FRESHLY CLEANED ROWS BEFORE THEY ARE STORED, SO A MEMORY-MAPPED STORE IS NEVER COPIED
+    schema = build_schema(tech)
+    df_ = df_.copy()
+    for col in schema.filter_columns:
+        if not isinstance(df_[col].dtype, pd.CategoricalDtype):
+            df_[col] = df_[col].astype("category")
+    for col in schema.numeric_columns:
+        df_[col] = downcast_numeric(df_[col])
+    return df_
+
+def memory_report(before, after):
+    # BYTES PER COLUMN (deep, SO OBJECT STRINGS ARE COUNTED) BEFORE AND AFTER compact_frame, KEPT IN THE STORE'S
+    # MANIFEST AS JSON (SEE report_to_json)
+    report = pd.DataFrame({"dtype before": before.dtypes.astype(str),
+                           "bytes before": before.memory_usage(index=False, deep=True),
+                           "dtype after": after.dtypes.astype(str),
+                           "bytes after": after.memory_usage(index=False, deep=True)})
+    report["saved"] = report["bytes before"] - report["bytes after"]
+    report.loc["TOTAL"] = ["", report["bytes before"].sum(), "", report["bytes after"].sum(), report["saved"].sum()]
+    return report
+
+def report_to_json(report):
+    return report.to_json(orient="split")
+
+def report_from_json(raw):
+    return pd.read_json(io.StringIO(raw), orient="split") if raw else None
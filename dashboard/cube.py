@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+import pandas as pd
+
+from dashboard.filters import filter_index
+from dashboard.kpi import DATE_COLUMN, aggregate, required_columns
+
+# SIDEBAR LABEL -> PANDAS PERIOD; A PERIOD IS LABELLED BY ITS FIRST DAY (AN ISO WEEK STARTS ON MONDAY)
+GRANULARITIES = {"Day": "D", "ISO Week": "W-SUN", "Month": "M"}
+# A CUBE WITH MORE THAN THIS SHARE OF THE ROWS IS NOT KEPT: SLICING IT WOULD COST ABOUT AS MUCH AS
+# FILTERING THE ROWS, FOR A SECOND COPY IN MEMORY AND IN THE STORE
+MAX_CUBE_SHARE = 0.5
+
+
+def build_cube(df_, kpis, dims, by=DATE_COLUMN):
+    # DAY x DIMENSION SUMS AND COUNTS, EVERY DIMENSION-LEVEL FILTER CAN BE ANSWERED FROM IT
+    return aggregate(df_, kpis, by, dims)
+
+def worth_keeping(cube, df_):
+    return len(cube) <= MAX_CUBE_SHARE * len(df_)
+
+def covers(cube, selections):
+    # None IS A CUBE THAT WAS NOT WORTH KEEPING
+    return cube is not None and all(col in cube.index.names for col, values in selections.items() if len(values))
+
+def merge_cubes(cube, new_cube, by=DATE_COLUMN):
+    # SUMS AND COUNTS ARE ADDITIVE, SO NEW ROWS CAN BE FOLDED INTO AN EXISTING CUBE
+    merged = pd.concat([cube, new_cube])
+    dates = cube.index.get_level_values(by)
+    new_dates = new_cube.index.get_level_values(by)
+    if len(cube) and len(new_cube) and new_dates.min() <= dates.max():
+        merged = merged.groupby(level=list(cube.index.names), sort=True, dropna=False).sum()
+    # concat AND groupby KEEP NaN AS A LEVEL VALUE, REBUILT IT IS CODE -1 LIKE IN A FRESHLY BUILT CUBE
+    merged.index = pd.MultiIndex.from_arrays([merged.index.get_level_values(name) for name in merged.index.names])
+    return merged
+
+def slice_cube(cube, date_start_filter, date_end_filter, selections, by=DATE_COLUMN):
+    return cube[filter_index(cube.index, date_start_filter, date_end_filter, selections, by)]
+
+# FEATHER ONLY STORES FLAT COLUMNS AND A DEFAULT INDEX
+def cube_to_frame(cube):
+    frame = cube.copy()
+    frame.columns = [f"{agg}|{col}" for agg, col in frame.columns]
+    return frame.reset_index()
+
+def cube_from_frame(frame):
+    cube = frame.set_index([col for col in frame.columns if "|" not in col])
+    cube.columns = pd.MultiIndex.from_tuples([tuple(col.split("|", 1)) for col in cube.columns])
+    return cube
+
+def rollup_periods(table, freq, by=DATE_COLUMN):
+    # DAILY SUMS AND COUNTS TO ONE ROW PER PERIOD (AND THE OTHER INDEX LEVELS). THEY ARE ADDITIVE, SO RATIO
+    # KPIS STAY WEIGHTED BY THEIR DENOMINATORS INSTEAD OF BECOMING AVERAGES OF DAILY RATIOS
+    index = table.index
+    keys = [pd.DatetimeIndex(index.get_level_values(by)).to_period(freq).start_time.rename(by)]
+    keys += [index.get_level_values(name) for name in index.names if name != by]
+    return table.groupby(keys, sort=True, dropna=False).sum()
+
+def build_rollups(cube, freqs=("W-SUN", "M"), by=DATE_COLUMN):
+    # COMPUTED ONCE PER DATASET FROM THE DAILY CUBE
+    return {freq: rollup_periods(cube, freq, by) for freq in freqs}
+
+def full_periods(date_start_filter, date_end_filter, freq):
+    # FIRST AND LAST PERIOD LYING WHOLLY INSIDE THE WINDOW, None WHEN THERE IS NONE
+    start, end = pd.Timestamp(date_start_filter), pd.Timestamp(date_end_filter)
+    first, last = pd.Period(start, freq), pd.Period(end, freq)
+    if first.start_time < start:
+        first += 1
+    if last.end_time.normalize() > end:
+        last -= 1
+    return (first, last) if first <= last else None
+
+def slice_rollup(cube, rollup, date_start_filter, date_end_filter, selections, freq, by=DATE_COLUMN):
+    # WHOLE PERIODS COME FROM THE PRECOMPUTED ROLLUP, THE PARTIAL ONES AT EITHER END OF THE WINDOW FROM THE
+    # DAILY CUBE, SO A YEAR READS ABOUT 52 (OR 12) ROWS PER DIMENSION COMBINATION INSTEAD OF 365
+    periods = full_periods(date_start_filter, date_end_filter, freq)
+    if periods is None:
+        return rollup_periods(slice_cube(cube, date_start_filter, date_end_filter, selections, by), freq, by)
+    first, last = periods
+    parts = [slice_cube(rollup, first.start_time, last.start_time, selections, by)]
+    day = timedelta(days=1)
+    if first.start_time > pd.Timestamp(date_start_filter):
+        head = slice_cube(cube, date_start_filter, first.start_time - day, selections, by)
+        parts.insert(0, rollup_periods(head, freq, by))
+    if last.end_time.normalize() < pd.Timestamp(date_end_filter):
+        tail = slice_cube(cube, last.end_time.normalize() + day, date_end_filter, selections, by)
+        parts.append(rollup_periods(tail, freq, by))
+    return pd.concat(parts)
+
+def period_days(dates, date_start_filter, date_end_filter, freq, by=DATE_COLUMN):
+    # DAYS WITH DATA (dates: EVERY DISTINCT DAY OF THE DATASET) PER PERIOD INSIDE THE WINDOW,
+    # TO TURN SUMMED ROW COUNTS INTO AVERAGE DAILY COUNTS
+    dates = pd.DatetimeIndex(dates)
+    dates = dates[(dates >= pd.Timestamp(date_start_filter)) & (dates <= pd.Timestamp(date_end_filter))]
+    return pd.Series(1, index=dates).groupby(dates.to_period(freq).start_time).sum().rename_axis(by)
+
+def average_counts(table, kpis, days, by=DATE_COLUMN):
+    # ROW COUNTS (E.G. "Count of Cell") SUMMED OVER A PERIOD BECOME AVERAGE DAILY COUNTS, MEANS KEEP THEIR COUNTS
+    _, means, counts, _ = required_columns(kpis)
+    columns = [("count", col) for col in counts if col not in means]
+    if not columns or not len(table):
+        return table
+    table = table.copy()
+    table[columns] = table[columns].div(days.reindex(table.index.get_level_values(by)).to_numpy(), axis=0)
+    return table
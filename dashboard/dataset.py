@@ -0,0 +1,115 @@
+import logging
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import pandas as pd
+
+from dashboard.cube import (average_counts, build_rollups, covers, period_days, rollup_periods, slice_cube,
+                            slice_rollup, worth_keeping)
+from dashboard.filters import build_option_index, filter_rows
+from dashboard.instrument import stage
+from dashboard.ingest import CACHE_DIR, CHUNK_BYTES, dataset_version, refresh, stored_memory_report
+from dashboard.kpi import DATE_COLUMN, aggregate
+from dashboard.matrix import build_matrix
+from dashboard.ranking import MIN_DENOMINATOR, TOP_N, cube_sums, level_sums, rank_offenders, ranked_columns
+from dashboard.registry import KPIS
+from dashboard.sqlstore import open_sqlite
+from dashboard.technology import Technology
+
+logger = logging.getLogger(__name__)
+
+# ONE Dataset PER TECHNOLOGY IS SHARED BY EVERY SESSION OF THE PROCESS (st.cache_resource) AND BY
+# EVERY CACHED STAGE THAT RECEIVES IT: NEVER ASSIGN INTO ITS FRAMES, FILTERING AND AGGREGATION
+# ALWAYS RETURN NEW FRAMES (MEMORY-MAPPED COLUMNS ARE READ-ONLY AND WOULD RAISE). CACHED STAGES
+# TAKE THE Dataset AS AN UNHASHED _dataset ARGUMENT AND ARE KEYED BY version INSTEAD.
+@dataclass(frozen=True)
+class Dataset:
+    tech: Technology
+    version: str
+    frame: pd.DataFrame = field(repr=False, compare=False)
+    # None WHEN IT WAS NOT WORTH KEEPING, THEN EVERY QUERY READS THE ROWS
+    cube: pd.DataFrame = field(repr=False, compare=False)
+    # PER-COLUMN MEMORY BEFORE AND AFTER THE STORE WAS COMPACTED, None WHEN IT IS NOT
+    memory: pd.DataFrame = field(default=None, repr=False, compare=False)
+
+    @property
+    def kpis(self):
+        return KPIS[self.tech.name]
+
+    def date_range(self):
+        dates = self.frame[DATE_COLUMN]
+        return dates.min(), dates.max()
+
+    def option_index(self):
+        return build_option_index(self.frame, self.tech.filter_columns)
+
+    def cells(self, date_start_filter, date_end_filter, selections):
+        # THE CELLS WITH ROWS MATCHING THE FILTERS
+        rows = filter_rows(self.frame, date_start_filter, date_end_filter, selections)
+        return rows[self.tech.cell_column].dropna().unique().tolist()
+
+    def cell_matrix(self, columns):
+        return build_matrix(self.frame, self.tech.cell_column, columns)
+
+    @cached_property
+    def days(self):
+        # EVERY DISTINCT DAY WITH DATA
+        return pd.DatetimeIndex(self.frame[DATE_COLUMN].unique()).sort_values()
+
+    def _uses_cube(self, selections):
+        # ONLY WHEN THE CUBE HAS EVERY FILTERED DIMENSION AND IS ACTUALLY SMALLER THAN THE ROWS
+        return covers(self.cube, selections) and worth_keeping(self.cube, self.frame)
+
+    @cached_property
+    def rollups(self):
+        # WEEKLY AND MONTHLY SUMS OF THE DAILY CUBE, BUILT ON FIRST USE AND KEPT WITH THE Dataset
+        with stage("build rollups"):
+            return build_rollups(self.cube)
+
+    def query(self, date_start_filter, date_end_filter, selections, granularity="D"):
+        # AGGREGATED SUMS AND COUNTS FOR THE FILTERS, FROM THE CUBE WHEN NO CELL IS SELECTED, PER DAY OR PER
+        # granularity PERIOD (SEE cube.GRANULARITIES)
+        if granularity != "D":
+            return self._query_periods(date_start_filter, date_end_filter, selections, granularity)
+        if self._uses_cube(selections):
+            with stage("query: slice cube"):
+                return slice_cube(self.cube, date_start_filter, date_end_filter, selections)
+        with stage("query: filter rows"):
+            rows = filter_rows(self.frame, date_start_filter, date_end_filter, selections)
+        with stage("query: aggregate rows"):
+            return aggregate(rows, self.kpis)
+
+    def _query_periods(self, date_start_filter, date_end_filter, selections, freq):
+        if self._uses_cube(selections):
+            with stage("query: slice rollup"):
+                table = slice_rollup(self.cube, self.rollups[freq], date_start_filter, date_end_filter, selections, freq)
+        else:
+            table = rollup_periods(self.query(date_start_filter, date_end_filter, selections), freq)
+        return average_counts(table, self.kpis, period_days(self.days, date_start_filter, date_end_filter, freq))
+
+    def offenders(self, date_start_filter, date_end_filter, selections, level, n=TOP_N, min_denominator=MIN_DENOMINATOR):
+        # THE n WORST VALUES OF level (A CELL OR A DIMENSION) FOR EVERY RATIO KPI, FROM ONE GROUPED PASS
+        columns = ranked_columns(self.kpis)
+        if self._uses_cube(selections) and level in self.cube.index.names:
+            with stage("offenders: slice cube"):
+                sums = cube_sums(slice_cube(self.cube, date_start_filter, date_end_filter, selections), level, columns)
+        else:
+            with stage("offenders: filter rows"):
+                rows = filter_rows(self.frame, date_start_filter, date_end_filter, selections)
+            with stage("offenders: group rows"):
+                sums = level_sums(rows, level, columns)
+        with stage("offenders: rank"):
+            return rank_offenders(sums, self.kpis, n, min_denominator)
+
+def load_dataset(tech, file_path=None, compact=False, memory_map=False, cache_dir=CACHE_DIR, executor=None,
+                 chunk_bytes=CHUNK_BYTES, backend="pandas"):
+    # backend "pandas" KEEPS THE ROWS IN MEMORY, "sqlite" KEEPS THEM IN AN INDEXED FILE AND QUERIES IT (SEE
+    # sqlstore.SqlDataset) FOR DATASETS LARGER THAN RAM; BOTH ANSWER THE SAME QUERIES
+    file_path = file_path or tech.file_path
+    version = dataset_version(file_path, tech)
+    if backend == "sqlite":
+        return open_sqlite(tech, file_path, version, cache_dir, executor, chunk_bytes)
+    # compact IS APPLIED BY refresh BEFORE THE STORE IS WRITTEN, SO A MEMORY-MAPPED FRAME IS USED AS IT IS
+    df_, cube = refresh(file_path, tech, cache_dir, memory_map, executor, chunk_bytes, compact)
+    memory = stored_memory_report(file_path, tech, cache_dir) if compact else None
+    return Dataset(tech, version, df_, cube, memory)
@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from dashboard.kpi import DATE_COLUMN
+
+
+def date_window(dates, date_start_filter, date_end_filter):
+    # dates MUST BE SORTED, THE WINDOW IS FOUND BY BINARY SEARCH INSTEAD OF A FULL COMPARISON
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(date_start_filter)), side="left")
+    hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(date_end_filter)), side="right")
+    return slice(lo, hi)
+
+def value_mask(codes, categories, values):
+    # ONE LOOKUP TABLE PER DIMENSION, INDEXED BY THE INTEGER CODES (-1 IS NaN)
+    wanted = categories.get_indexer(values)
+    lookup = np.zeros(len(categories) + 1, dtype=bool)
+    lookup[wanted[wanted >= 0]] = True
+    lookup[-1] = pd.isna(np.asarray(values, dtype=object)).any()
+    return lookup[codes]
+
+def filter_rows(df_, date_start_filter, date_end_filter, selections, by=DATE_COLUMN):
+    # UNSELECTED DIMENSIONS ARE SKIPPED, SO THE COST GROWS WITH THE ACTIVE FILTERS ONLY
+    if df_[by].is_monotonic_increasing:
+        df_ = df_.iloc[date_window(df_[by], date_start_filter, date_end_filter)]
+    else:
+        df_ = df_[(df_[by] >= pd.Timestamp(date_start_filter)) & (df_[by] <= pd.Timestamp(date_end_filter))]
+    mask = np.ones(len(df_), dtype=bool)
+    for col, values in selections.items():
+        if not len(values):
+            continue
+        column = df_[col]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            mask &= value_mask(column.cat.codes.to_numpy(), column.cat.categories, values)
+        else:
+            mask &= column.isin(values).to_numpy()
+    return df_ if mask.all() else df_[mask]
+
+def filter_index(index, date_start_filter, date_end_filter, selections, by=DATE_COLUMN):
+    # SAME AS filter_rows BUT ON THE LEVEL CODES OF AN AGGREGATED MultiIndex
+    level = index.names.index(by)
+    dates = index.levels[level].take(index.codes[level])
+    if dates.is_monotonic_increasing:
+        window = date_window(dates, date_start_filter, date_end_filter)
+        mask = np.zeros(len(index), dtype=bool)
+        mask[window] = True
+    else:
+        mask = np.asarray((dates >= pd.Timestamp(date_start_filter)) & (dates <= pd.Timestamp(date_end_filter)))
+    for col, values in selections.items():
+        if len(values):
+            level = index.names.index(col)
+            mask &= value_mask(index.codes[level], index.levels[level], values)
+    return mask
+
+
+@dataclass(frozen=True)
+class OptionIndex:
+    columns: tuple
+    # ONE ROW PER DISTINCT COMBINATION OF THE FILTER DIMENSIONS, AS CATEGORY CODES
+    codes: np.ndarray
+    categories: dict
+
+def build_option_index(df_, columns):
+    columns = tuple(columns)
+    codes = pd.DataFrame({col: df_[col].astype("category").cat.codes for col in columns}).drop_duplicates()
+    categories = {col: df_[col].astype("category").cat.categories for col in columns}
+    return OptionIndex(columns, codes.to_numpy(), categories)
+
+def cascade_options(option_index, selections):
+    # EACH DIMENSION LISTS THE VALUES THAT STILL CO-OCCUR WITH THE OTHER SELECTIONS,
+    # ITS OWN SELECTION IS KEPT SO THE WIDGET NEVER LOSES A CHOSEN VALUE
+    masks = {col: value_mask(option_index.codes[:, i], option_index.categories[col], selections[col])
+             for i, col in enumerate(option_index.columns) if len(selections.get(col, []))}
+    options = {}
+    for i, col in enumerate(option_index.columns):
+        mask = np.ones(len(option_index.codes), dtype=bool)
+        for other, other_mask in masks.items():
+            if other != col:
+                mask &= other_mask
+        present = np.unique(option_index.codes[mask, i])
+        values = option_index.categories[col].take(present[present >= 0]).tolist()
+        if (present < 0).any():
+            values.append(np.nan)
+        chosen = [value for value in selections.get(col, []) if value not in values]
+        options[col] = values + chosen
+    return options
+
+def canonical_selections(option_index, selections):
+    # SORTED, HASHABLE SELECTIONS FOR CACHE KEYS. A SELECTION THAT FILTERS NOTHING (EMPTY, OR HOLDING EVERY VALUE
+    # THAT STILL CO-OCCURS WITH THE OTHER SELECTIONS) IS DROPPED, SO IT GETS THE SAME KEY AS LEAVING THE FILTER EMPTY
+    active = {col: values for col, values in selections.items() if len(values)}
+    masks = {col: value_mask(option_index.codes[:, option_index.columns.index(col)], option_index.categories[col],
+                             values)
+             for col, values in active.items() if col in option_index.columns}
+    # IN A FIXED ORDER, SO THE SAME SELECTIONS ALWAYS KEEP THE SAME FILTERS
+    for col in [col for col in option_index.columns if col in masks]:
+        others = np.ones(len(option_index.codes), dtype=bool)
+        for other, other_mask in masks.items():
+            if other != col:
+                others &= other_mask
+        if masks[col][others].all():
+            del masks[col], active[col]
+    return tuple((col, tuple(sorted(set(values), key=str))) for col, values in sorted(active.items()))
@@ -0,0 +1,334 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from pandas.api.types import is_float_dtype
+from pandas.api.types import union_categoricals
+
+from dashboard.cleaning import clean_frame
+from dashboard.compact import compact_frame, memory_report, report_from_json, report_to_json
+from dashboard.cube import build_cube, cube_from_frame, cube_to_frame, merge_cubes, worth_keeping
+from dashboard.instrument import stage
+from dashboard.kpi import required_columns
+from dashboard.registry import KPIS
+from dashboard.schema import build_schema
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever clean_frame changes its output so old stores are rebuilt
+PIPELINE_VERSION = 6
+CACHE_DIR = Path("data") / ".cache"
+# ROWS ARE CLEANED IN CHUNKS OF ABOUT THIS MANY BYTES WHEN refresh GETS AN EXECUTOR
+CHUNK_BYTES = 64 << 20
+# BYTES HASHED AT THE START OF A SOURCE FILE AND JUST BEFORE THE LAST PROCESSED OFFSET,
+# IF EITHER CHANGED THE FILE WAS REWRITTEN RATHER THAN APPENDED TO
+CHECK_BYTES = 1 << 16
+# ONE LOCK PER STORE: A SECOND refresh OF THE SAME SOURCE IN THIS PROCESS WAITS AND THEN READS THE STORE
+_store_locks = {}
+_store_locks_guard = threading.Lock()
+
+
+def _sha1(raw):
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+def source_files(source):
+    # A SOURCE IS ONE (GROWING) CSV OR A DIRECTORY OF DAILY CSV EXPORTS
+    path = Path(source)
+    return sorted(path.glob("*.csv")) if path.is_dir() else [path]
+
+def source_fingerprint(source):
+    parts = []
+    for path in source_files(source):
+        stat = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}")
+    return _sha1("\n".join(parts))
+
+def pipeline_key(tech):
+    return _sha1(f"{PIPELINE_VERSION}|{tech!r}|{required_columns(KPIS[tech.name])}")
+
+def dataset_version(source, tech):
+    # CHEAP TOKEN (ONE stat CALL PER FILE) THAT CHANGES WITH THE SOURCE OR ANY TRANSFORM
+    return _sha1(f"{source_fingerprint(source)}|{pipeline_key(tech)}")
+
+def store_path(source, tech, kind, cache_dir=CACHE_DIR):
+    suffix = {"manifest": "json", "sqlite": "sqlite"}.get(kind, "feather")
+    key = _sha1(f"{os.path.abspath(source)}|{tech.name}")[:8]
+    return Path(cache_dir) / f"{Path(source).stem}-{key}-{kind}.{suffix}"
+
+def read_source(file_path, tech, offset=0, end=None):
+    # READS BYTES [offset, end) OF THE FILE, A CHUNK PAST THE HEADER REUSES THE FILE'S COLUMN NAMES,
+    # ONLY THE SCHEMA'S COLUMNS ARE PARSED AND EXACT NULL TOKENS ARE LEFT TO THE PARSER
+    schema = build_schema(tech)
+    options = {"usecols": list(schema.columns), "dtype": schema.dtype,
+               "na_values": list(tech.null_tokens), "keep_default_na": True,
+               # ONE TYPE PER COLUMN: A TEXT COLUMN HOLDS ONLY STRINGS, NOT STRINGS AND FLOATS BY CHUNK
+               "low_memory": False}
+    if not offset and (end is None or end == os.stat(file_path).st_size):
+        return pd.read_csv(file_path, **options)
+    with open(file_path, "rb") as file:
+        file.seek(offset)
+        chunk = io.BytesIO(file.read() if end is None else file.read(end - offset))
+    if not offset:
+        return pd.read_csv(chunk, **options)
+    return pd.read_csv(chunk, header=None, names=pd.read_csv(file_path, nrows=0).columns, **options)
+
+def byte_ranges(file_path, offset, end, chunk_bytes=CHUNK_BYTES):
+    # SPLITS [offset, end) INTO RANGES OF ABOUT chunk_bytes THAT END ON A LINE BREAK
+    # (AN EXPORT HAS NO LINE BREAKS INSIDE QUOTED FIELDS)
+    ranges = []
+    with open(file_path, "rb") as file:
+        start = offset
+        while end - start > chunk_bytes:
+            file.seek(start + chunk_bytes)
+            file.readline()
+            stop = min(file.tell(), end)
+            ranges.append((start, stop))
+            start = stop
+    if end > start or not ranges:
+        ranges.append((start, end))
+    return ranges
+
+def read_clean(file_path, tech, offset, end):
+    # ONE CHUNK, RUN IN A WORKER PROCESS
+    return clean_frame(read_source(file_path, tech, offset, end), tech)
+
+def concat_frames(frames, tech):
+    # CLEANED CHUNKS IN FILE ORDER, CATEGORIES ARE UNIONED AND ROWS KEPT IN STABLE DATE ORDER
+    frames = [df_ for df_ in frames if len(df_)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+    combined = pd.concat(frames, ignore_index=True)
+    for col in tech.filter_columns:
+        try:
+            combined[col] = union_categoricals([df_[col] for df_ in frames], sort_categories=True)
+        except TypeError:
+            combined[col] = combined[col].astype("category")
+    date_column = tech.date_columns[0]
+    if not combined[date_column].is_monotonic_increasing:
+        combined = combined.sort_values(date_column, kind="stable", ignore_index=True)
+    return combined
+
+def clean_sources(reads, tech, executor=None, chunk_bytes=CHUNK_BYTES):
+    # reads ARE (path, offset, end) BYTE RANGES. WITHOUT AN EXECUTOR THEY ARE READ AND CLEANED AS ONE FRAME,
+    # WITH ONE THEY ARE SPLIT INTO CHUNKS THAT ARE READ AND CLEANED IN PARALLEL, THEN CONCATENATED
+    if executor is None:
+        with stage("read csv"):
+            raw = [read_source(path, tech, offset, end) for path, offset, end in reads]
+        with stage("clean_frame"):
+            return clean_frame(pd.concat(raw, ignore_index=True), tech)
+    with stage("read csv and clean_frame (parallel)"):
+        chunks = [(path, start, stop) for path, offset, end in reads
+                  for start, stop in byte_ranges(path, offset, end, chunk_bytes)]
+        futures = [executor.submit(read_clean, path, tech, start, stop) for path, start, stop in chunks]
+        frames = [future.result() for future in futures]
+    with stage("concat chunks"):
+        return concat_frames(frames, tech)
+
+def _to_arrow(df_):
+    # FLOAT NaN IS KEPT AS A VALUE INSTEAD OF A NULL, SO THE COLUMN CAN BE MAPPED WITHOUT A COPY
+    df_ = df_.reset_index(drop=True)
+    table = pa.Table.from_pandas(df_, preserve_index=False)
+    for i, col in enumerate(df_.columns):
+        if is_float_dtype(df_[col]):
+            table = table.set_column(i, col, pa.array(df_[col].to_numpy(), from_pandas=False))
+    return table
+
+def write_cache(df_, path, memory_map=False):
+    # A MEMORY-MAPPED STORE IS WRITTEN UNCOMPRESSED
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        if memory_map:
+            feather.write_feather(_to_arrow(df_), tmp_path, compression="uncompressed")
+        else:
+            df_.reset_index(drop=True).to_feather(tmp_path)
+        # FAILS ON WINDOWS WHILE ANOTHER PROCESS STILL MAPS THE OLD FILE
+        os.replace(tmp_path, path)
+    except (pa.ArrowException, OSError) as exc:
+        logger.warning("Could not write ingest cache %s: %s", path, exc)
+        tmp_path.unlink(missing_ok=True)
+        return False
+    return True
+
+def read_cache(path, memory_map=False):
+    # MAPPED COLUMNS ARE READ-ONLY VIEWS OF THE FILE, WORKER PROCESSES SHARE THEIR PAGES THROUGH THE OS
+    if not memory_map:
+        return pd.read_feather(path)
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+def _hash_bytes(path, start, length):
+    with open(path, "rb") as file:
+        file.seek(start)
+        return hashlib.sha1(file.read(length)).hexdigest()
+
+def complete_size(path, size, block=CHECK_BYTES):
+    # BYTES UP TO AND INCLUDING THE LAST LINE BREAK: A LINE STILL BEING WRITTEN IS LEFT FOR THE NEXT REFRESH
+    with open(path, "rb") as file:
+        end = size
+        while end > 0:
+            start = max(0, end - block)
+            file.seek(start)
+            found = file.read(end - start).rfind(b"\n")
+            if found >= 0:
+                return start + found + 1
+            end = start
+    return 0
+
+def complete_sizes(stats):
+    return {path: complete_size(path, stat.st_size) for path, stat in stats.items()}
+
+def file_state(path, stat, size=None):
+    # size (BY DEFAULT THE FILE SIZE) IS WHAT WAS INGESTED, THE HASHES COVER THOSE BYTES
+    size = stat.st_size if size is None else size
+    return {"size": size,
+            "file_size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "head": _hash_bytes(path, 0, min(size, CHECK_BYTES)),
+            "tail": _hash_bytes(path, max(0, size - CHECK_BYTES), min(size, CHECK_BYTES))}
+
+def _same_prefix(path, old):
+    size = old["size"]
+    return (_hash_bytes(path, 0, min(size, CHECK_BYTES)) == old["head"]
+            and _hash_bytes(path, max(0, size - CHECK_BYTES), min(size, CHECK_BYTES)) == old["tail"])
+
+def pending_reads(stats, manifest, sizes=None):
+    # (path, offset) PAIRS STILL TO INGEST UP TO sizes (BY DEFAULT THE FILE SIZES), OR None WHEN A PROCESSED
+    # FILE WAS REWRITTEN OR REMOVED
+    if set(manifest["files"]) - {str(path) for path in stats}:
+        return None
+    sizes = sizes or {path: stat.st_size for path, stat in stats.items()}
+    pending = []
+    for path, stat in stats.items():
+        old = manifest["files"].get(str(path))
+        if old is None:
+            if sizes[path]:
+                pending.append((path, 0))
+        elif (stat.st_size, stat.st_mtime_ns) == (old.get("file_size", old["size"]), old["mtime_ns"]):
+            continue
+        elif sizes[path] < old["size"] or not _same_prefix(path, old):
+            return None
+        elif sizes[path] > old["size"]:
+            pending.append((path, old["size"]))
+    return pending
+
+def append_rows(df_, new, tech):
+    # ALREADY PROCESSED ROWS ARE KEPT AS THEY ARE, CATEGORIES ARE UNIONED
+    return concat_frames([df_, new], tech)
+
+def _read_cube(manifest, cube_path):
+    # None WHEN THE CUBE WAS NOT WORTH KEEPING (SEE cube.MAX_CUBE_SHARE)
+    return cube_from_frame(read_cache(cube_path)) if manifest.get("cube", True) else None
+
+def _kept(cube, df_, tech):
+    if cube is not None and not worth_keeping(cube, df_):
+        logger.info("%s cube has %d rows for %d rows, not kept", tech.name, len(cube), len(df_))
+        return None
+    return cube
+
+def store_lock(manifest_path):
+    with _store_locks_guard:
+        return _store_locks.setdefault(os.path.abspath(manifest_path), threading.Lock())
+
+def refresh(source, tech, cache_dir=CACHE_DIR, memory_map=False, executor=None, chunk_bytes=CHUNK_BYTES,
+            compact=False):
+    # BRINGS THE STORED FRAME AND CUBE UP TO DATE WITH THE SOURCE, CLEANING ONLY NEW ROWS,
+    # WITH memory_map THE RETURNED FRAME IS BACKED BY THE STORED FILE, WITH AN executor (A PROCESS POOL)
+    # THE ROWS ARE CLEANED IN PARALLEL CHUNKS, WITH compact THEY ARE STORED COMPACTED (SEE compact_frame)
+    manifest_path = store_path(source, tech, "manifest", cache_dir)
+    with store_lock(manifest_path):
+        return _refresh(source, tech, cache_dir, memory_map, executor, chunk_bytes, compact)
+
+def _compacted(df_, tech):
+    with stage("compact frame"):
+        compacted = compact_frame(df_, tech)
+    memory = memory_report(df_, compacted)
+    logger.info("Compacted %s frame from %d to %d bytes", tech.name, *memory.loc["TOTAL", ["bytes before", "bytes after"]])
+    return compacted, memory
+
+def stored_memory_report(source, tech, cache_dir=CACHE_DIR):
+    # THE memory_report OF THE LAST COMPACTION OF THE STORE, None WHEN IT IS NOT COMPACTED
+    manifest_path = store_path(source, tech, "manifest", cache_dir)
+    if not manifest_path.exists():
+        return None
+    return report_from_json(json.loads(manifest_path.read_text()).get("memory"))
+
+def _refresh(source, tech, cache_dir, memory_map, executor, chunk_bytes, compact):
+    kpis = KPIS[tech.name]
+    frame_path = store_path(source, tech, "clean", cache_dir)
+    cube_path = store_path(source, tech, "cube", cache_dir)
+    manifest_path = store_path(source, tech, "manifest", cache_dir)
+    # SIZES ARE TAKEN BEFORE READING SO ROWS APPENDED MEANWHILE ARE PICKED UP NEXT TIME, AND CUT AT THE
+    # LAST COMPLETE LINE SO A HALF-WRITTEN ONE IS NEITHER PARSED NOR RECORDED AS INGESTED
+    stats = {path: os.stat(path) for path in source_files(source)}
+    sizes = complete_sizes(stats)
+
+    manifest = None
+    if manifest_path.exists() and frame_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        # A COMPACTED STORE CANNOT BE TURNED BACK INTO THE CLEANED DTYPES, SO SWITCHING compact REBUILDS IT
+        if (manifest.get("pipeline") != pipeline_key(tech) or manifest.get("compact", False) != compact
+                or (manifest.get("cube", True) and not cube_path.exists())):
+            manifest = None
+    pending = pending_reads(stats, manifest, sizes) if manifest else None
+    memory = manifest.get("memory") if manifest else None
+
+    if pending is None:
+        df_ = clean_sources([(path, 0, size) for path, size in sizes.items() if size], tech, executor, chunk_bytes)
+        with stage("build cube"):
+            cube = _kept(build_cube(df_, kpis, tech.cube_columns), df_, tech)
+        if compact:
+            df_, memory = _compacted(df_, tech)
+            memory = report_to_json(memory)
+    elif not pending and manifest.get("memory_map", False) == memory_map:
+        with stage("read store"):
+            return read_cache(frame_path, memory_map), _read_cube(manifest, cube_path)
+    elif not pending:
+        # SAME ROWS, REWRITTEN IN THE OTHER STORAGE FORMAT
+        with stage("read store"):
+            df_, cube = read_cache(frame_path), _read_cube(manifest, cube_path)
+    else:
+        logger.info("Appending %s to %s", [f"{path}@{offset}" for path, offset in pending], frame_path)
+        new = clean_sources([(path, offset, sizes[path]) for path, offset in pending], tech, executor, chunk_bytes)
+        with stage("append to store"):
+            df_ = append_rows(read_cache(frame_path), new, tech)
+            # A DROPPED CUBE STAYS DROPPED UNTIL THE NEXT REBUILD
+            cube = _read_cube(manifest, cube_path)
+            if cube is not None:
+                cube = _kept(merge_cubes(cube, build_cube(new, kpis, tech.cube_columns)), df_, tech)
+        if compact:
+            # THE NEW ROWS CAN NEED WIDER DTYPES THAN THE STORED ONES, THE MERGED FRAME IS DOWNCAST AGAIN
+            df_, memory = _compacted(df_, tech)
+            memory = report_to_json(memory)
+
+    with stage("write store"):
+        stored = write_cache(df_, frame_path, memory_map) and (cube is None or write_cache(cube_to_frame(cube), cube_path))
+        if cube is None:
+            cube_path.unlink(missing_ok=True)
+    if stored:
+        manifest = {"pipeline": pipeline_key(tech),
+                    "memory_map": memory_map,
+                    "compact": compact,
+                    "memory": memory,
+                    "cube": cube is not None,
+                    "files": {str(path): file_state(path, stat, sizes[path]) for path, stat in stats.items()}}
+        tmp_path = manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=1))
+        os.replace(tmp_path, manifest_path)
+        if memory_map:
+            df_ = read_cache(frame_path, memory_map)
+    else:
+        manifest_path.unlink(missing_ok=True)
+    return df_, cube
+
+def load_clean(file_path, tech, cache_dir=CACHE_DIR):
+    return refresh(file_path, tech, cache_dir)[0]
+
+def load_cube(file_path, tech, cache_dir=CACHE_DIR):
+    return refresh(file_path, tech, cache_dir)[1]
@@ -0,0 +1,111 @@
+import json
+import logging
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# ONE RUN PER SCRIPT THREAD (A STREAMLIT RERUN), NOTHING IS RECORDED WHILE NO RUN IS ACTIVE
+_local = threading.local()
+# tracemalloc IS PROCESS-WIDE: IT RUNS WHILE ANY RUN OF ANY SESSION TRACES MEMORY
+_memory_runs = 0
+_memory_runs_guard = threading.Lock()
+_handler_guard = threading.Lock()
+
+
+class _Run:
+    def __init__(self, page, memory):
+        self.id = uuid.uuid4().hex[:8]
+        self.page = page
+        self.memory = memory
+        self.records = []
+        self.stack = []
+
+
+def _end_run():
+    # THE LAST RUN THAT TRACES MEMORY STOPS tracemalloc
+    global _memory_runs
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is not None and run.memory:
+        with _memory_runs_guard:
+            _memory_runs -= 1
+            if not _memory_runs and tracemalloc.is_tracing():
+                tracemalloc.stop()
+    return run
+
+def _log_to_stderr():
+    # THE PAGES DO NOT CONFIGURE LOGGING, SO THE ROOT LOGGER WOULD DROP THE STAGE LINES: WITHOUT ANY HANDLER
+    # ABOVE IT, THIS LOGGER WRITES ONE JSON OBJECT PER LINE TO stderr, AND IT ALWAYS PASSES INFO ON
+    with _handler_guard:
+        if not logger.hasHandlers():
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        if logger.getEffectiveLevel() > logging.INFO:
+            logger.setLevel(logging.INFO)
+
+def start_run(page, enabled=True, memory=True):
+    # memory TRACES ALLOCATIONS WITH tracemalloc, PROCESS-WIDE, SO CONCURRENT SESSIONS SHOW UP IN EACH OTHER'S PEAKS
+    global _memory_runs
+    # A RERUN THAT STOPPED BEFORE finish_run LEFT ITS RUN OPEN
+    _end_run()
+    if not enabled:
+        return
+    _log_to_stderr()
+    if memory:
+        with _memory_runs_guard:
+            _memory_runs += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+    _local.run = _Run(page, memory)
+
+def finish_run():
+    # RETURNS THE RUN'S RECORDS AS A FRAME, None WHEN INSTRUMENTATION WAS OFF
+    run = _end_run()
+    if run is None:
+        return None
+    return pd.DataFrame(run.records, columns=["stage", "depth", "seconds", "peak_mb", "cache"])
+
+def cache_miss():
+    # CALLED FROM INSIDE A CACHED FUNCTION: ITS BODY ONLY RUNS ON A MISS
+    run = getattr(_local, "run", None)
+    if run is not None and run.stack:
+        run.stack[-1]["cache"] = "miss"
+
+@contextmanager
+def stage(name, cached=False):
+    run = getattr(_local, "run", None)
+    if run is None:
+        yield
+        return
+    frame = {"cache": "hit" if cached else None, "peak": 0}
+    if run.memory:
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    run.stack.append(frame)
+    # THE SLOT IS TAKEN ON ENTRY SO RECORDS LIST IN START ORDER, PARENTS BEFORE CHILDREN
+    slot = len(run.records)
+    run.records.append(None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        run.stack.pop()
+        peak_mb = None
+        if run.memory:
+            # A NESTED STAGE RESETS THE PEAK, SO CHILD PEAKS ARE FOLDED INTO THEIR PARENT
+            peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+            peak_mb = round((peak - start_bytes) / 2 ** 20, 2)
+            if run.stack:
+                run.stack[-1]["peak"] = max(run.stack[-1]["peak"], peak)
+        record = {"stage": name, "depth": len(run.stack), "seconds": round(seconds, 4),
+                  "peak_mb": peak_mb, "cache": frame["cache"]}
+        run.records[slot] = record
+        logger.info(json.dumps({"run": run.id, "page": run.page, **record}))
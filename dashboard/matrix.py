@@ -0,0 +1,104 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from dashboard.kpi import DATE_COLUMN
+
+# PRESETS AND CONSTANTS
+# A DAY IS COMPARED WITH THE window DAYS BEFORE IT, AND ONLY WHEN AT LEAST min_periods OF THEM HAVE DATA
+WINDOW = 7
+MIN_PERIODS = 4
+Z_THRESHOLD = 3.0
+
+
+@dataclass(frozen=True)
+class CellMatrix:
+    # ONE cells x days float64 ARRAY PER COLUMN, ROW i IS CATEGORY i OF THE CELL COLUMN, NaN WHERE A CELL HAS NO DATA
+    cells: pd.Index
+    dates: pd.DatetimeIndex
+    values: dict = field(repr=False)
+
+    def day(self, date):
+        return self.dates.get_loc(pd.Timestamp(date))
+
+    def kpi(self, kpi, min_denominator=0):
+        # THE KPI OF EVERY CELL ON EVERY DAY, FROM THE SAME FORMULA AS THE CHARTS
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = np.asarray(kpi.evaluate(self.values), dtype=np.float64)
+        if min_denominator:
+            value[sum(self.values[col] for col in kpi.denominator) < min_denominator] = np.nan
+        return value
+
+def build_matrix(df_, cell_column, columns, by=DATE_COLUMN):
+    # DAILY SUMS PER CELL WITH ONE np.bincount PER COLUMN OVER THE FLAT (cell, day) POSITION
+    cell = df_[cell_column]
+    if not isinstance(cell.dtype, pd.CategoricalDtype):
+        cell = cell.astype("category")
+    codes = cell.cat.codes.to_numpy()
+    days = df_[by].to_numpy(dtype="datetime64[D]")
+    keep = (codes >= 0) & ~np.isnat(days)
+    codes, days = codes[keep], days[keep]
+    first = days.min() if len(days) else np.datetime64("NaT", "D")
+    dates = pd.date_range(first, days.max(), freq="D") if len(days) else pd.DatetimeIndex([])
+    shape = (len(cell.cat.categories), len(dates))
+    position = codes.astype(np.int64) * shape[1] + (days - first).astype(np.int64)
+    values = {}
+    for col in columns:
+        column = df_[col].to_numpy(dtype=np.float64)[keep]
+        present = ~np.isnan(column)
+        sums = np.bincount(position[present], weights=column[present], minlength=shape[0] * shape[1])
+        counts = np.bincount(position[present], minlength=shape[0] * shape[1])
+        sums[counts == 0] = np.nan
+        values[col] = sums.reshape(shape)
+    return CellMatrix(cell.cat.categories.rename(cell_column), dates, values)
+
+def day_delta(values):
+    # DAY-OVER-DAY CHANGE, NaN ON THE FIRST DAY AND NEXT TO GAPS
+    return np.diff(values, axis=1, prepend=np.nan)
+
+def rolling_baseline(values, window=WINDOW, min_periods=MIN_PERIODS):
+    # MEAN AND SAMPLE STD OF THE window DAYS BEFORE EACH DAY (THE DAY ITSELF EXCLUDED), FOR EVERY CELL AT ONCE
+    # FROM CUMULATIVE SUMS, SO THE COST DOES NOT GROW WITH window
+    present = np.isfinite(values)
+    filled = np.where(present, values, 0.0)
+    start = np.zeros((values.shape[0], 1))
+    total = np.concatenate([start, np.cumsum(filled, axis=1)], axis=1)
+    squares = np.concatenate([start, np.cumsum(filled ** 2, axis=1)], axis=1)
+    counts = np.concatenate([start, np.cumsum(present, axis=1)], axis=1)
+    hi = np.arange(values.shape[1])
+    lo = np.maximum(hi - window, 0)
+    n = counts[:, hi] - counts[:, lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (total[:, hi] - total[:, lo]) / n
+        variance = np.maximum((squares[:, hi] - squares[:, lo]) - n * mean ** 2, 0) / (n - 1)
+    mean[n < max(min_periods, 2)] = np.nan
+    return mean, np.sqrt(variance)
+
+def zscore(values, window=WINDOW, min_periods=MIN_PERIODS):
+    mean, std = rolling_baseline(values, window, min_periods)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (values - mean) / std
+    z[~np.isfinite(z)] = np.nan
+    return z, mean
+
+def anomalies(matrix, kpi, date_start, date_end, rows=None, window=WINDOW, threshold=Z_THRESHOLD, min_denominator=0):
+    # CELLS WHOSE KPI WAS threshold STANDARD DEVIATIONS WORSE THAN THEIR OWN BASELINE ON SOME DAY OF THE WINDOW,
+    # WITH THEIR WORST DAY
+    value = matrix.kpi(kpi, min_denominator)
+    z, mean = zscore(value, window)
+    lo = matrix.dates.searchsorted(pd.Timestamp(date_start), side="left")
+    hi = matrix.dates.searchsorted(pd.Timestamp(date_end), side="right")
+    badness = z[:, lo:hi] if kpi.higher_is_worse else -z[:, lo:hi]
+    badness = np.where(np.isnan(badness), -np.inf, badness)
+    if rows is not None:
+        badness = badness[rows]
+    else:
+        rows = np.arange(len(matrix.cells))
+    worst_day = badness.argmax(axis=1) if badness.shape[1] else np.zeros(len(rows), dtype=int)
+    worst = badness[np.arange(len(rows)), worst_day] if badness.shape[1] else np.full(len(rows), -np.inf)
+    flagged = np.flatnonzero(worst >= threshold)
+    flagged = flagged[np.argsort(-worst[flagged], kind="stable")]
+    cells, days = rows[flagged], lo + worst_day[flagged]
+    return pd.DataFrame({matrix.cells.name: matrix.cells[cells], "day": matrix.dates[days], kpi.key: value[cells, days],
+                         "baseline": mean[cells, days], "z": z[cells, days]})
@@ -0,0 +1,79 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+
+from dashboard.filters import canonical_selections
+from dashboard.ingest import dataset_version
+from dashboard.results import cached_kpi_tables
+
+logger = logging.getLogger(__name__)
+
+# PRESETS AND CONSTANTS
+# EVERY SINGLE VALUE OF THESE DIMENSIONS IS PRE-WARMED
+DIMENSIONS = ("REGIONAL", "PROJECT")
+# DATE WINDOWS ENDING ON THE LAST DAY, IN DAYS: THE PAGE'S DEFAULT (THE LAST DAY) AND THE LATEST WEEK
+WINDOWS = (1, 7)
+# AT MOST THIS MANY PRE-WARM QUERIES RUN AT ONCE IN THE PROCESS, WHATEVER THE NUMBER OF PRE-WARMERS,
+# SO INTERACTIVE SESSIONS KEEP MOST OF THE CPU
+MAX_CONCURRENCY = 1
+_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+
+def prewarm_sets(option_index, dimensions=DIMENSIONS, popular=()):
+    # THE POPULAR FILTER SETS FIRST, THEN NO FILTER, THEN EACH SINGLE VALUE OF EACH DIMENSION,
+    # IN CANONICAL FORM (THE RESULT CACHE'S KEYS) WITHOUT DUPLICATES
+    sets = [dict(selections) for selections in popular] + [{}]
+    for col in dimensions:
+        if col in option_index.columns:
+            sets += [{col: [value]} for value in option_index.categories[col]]
+    return list(dict.fromkeys(canonical_selections(option_index, selections) for selections in sets))
+
+def date_windows(first, last, windows=WINDOWS):
+    # (start, end) AS datetime.date, LIKE THE PAGE'S DATE INPUTS, SO THE CACHE KEYS MATCH
+    first, last = pd.Timestamp(first).date(), pd.Timestamp(last).date()
+    return list(dict.fromkeys((max(first, last - timedelta(days=days - 1)), last) for days in windows))
+
+
+class Prewarmer:
+    # FILLS cache WITH THE KPI TABLES OF selections_list IN A SMALL THREAD POOL, AND STOPS AS SOON AS
+    # file_path NO LONGER HAS THE DATASET'S VERSION
+    def __init__(self, dataset, file_path, cache, selections_list, windows=WINDOWS, workers=MAX_CONCURRENCY):
+        self.dataset = dataset
+        self.file_path = file_path
+        self.cache = cache
+        self.tasks = [(start, end, selections) for start, end in date_windows(*dataset.date_range(), windows)
+                      for selections in selections_list]
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix=f"prewarm-{dataset.tech.name}")
+        self.cancelled = threading.Event()
+        self.done = 0
+
+    def start(self):
+        logger.info("Pre-warming %d %s filter sets", len(self.tasks), self.dataset.tech.name)
+        self.futures = [self.executor.submit(self._run, *task) for task in self.tasks]
+        self.executor.shutdown(wait=False)
+        return self
+
+    def wait(self):
+        for future in self.futures:
+            if not future.cancelled():
+                future.result()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+        for future in self.futures:
+            future.cancel()
+
+    def _run(self, date_start_filter, date_end_filter, selections):
+        if self.cancelled.is_set():
+            return
+        if dataset_version(self.file_path, self.dataset.tech) != self.dataset.version:
+            logger.info("%s data changed, pre-warming stopped after %d filter sets", self.dataset.tech.name, self.done)
+            self.cancel()
+            return
+        with _slots:
+            cached_kpi_tables(self.cache, self.dataset, date_start_filter, date_end_filter, selections)
+        self.done += 1
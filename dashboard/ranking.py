@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# PRESETS AND CONSTANTS
+TOP_N = 20
+# A CELL (OR CLUSTER) WITH FEWER ATTEMPTS THAN THIS IN THE WINDOW IS NOT RANKED, ITS RATIO IS NOISE
+MIN_DENOMINATOR = 100
+
+
+def rankable(kpis):
+    # ONLY RATIO KPIS HAVE A DENOMINATOR TO THRESHOLD ON
+    return [kpi for kpi in kpis if kpi.denominator]
+
+def ranked_columns(kpis):
+    return list(dict.fromkeys(col for kpi in rankable(kpis) for col in kpi.summed_columns))
+
+def _bincount_sums(codes, categories, values, columns):
+    # ONE PASS PER COLUMN WITH np.bincount ON THE CODES (-1 IS NaN AND IS DROPPED), NaN VALUES ADD 0 LIKE groupby().sum()
+    keep = codes >= 0
+    codes = codes[keep]
+    size = len(categories)
+    sums = {}
+    for col in columns:
+        weights = np.nan_to_num(np.asarray(values[col], dtype=np.float64)[keep])
+        sums[col] = np.bincount(codes, weights=weights, minlength=size)
+    present = np.bincount(codes, minlength=size) > 0
+    return pd.DataFrame(sums, index=categories)[present]
+
+def level_sums(df_, level, columns):
+    column = df_[level]
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype("category")
+    return _bincount_sums(column.cat.codes.to_numpy(), column.cat.categories.rename(level), df_, columns)
+
+def cube_sums(cube, level, columns):
+    # SAME AS level_sums FROM AN ALREADY SLICED CUBE, ON THE CODES OF ONE OF ITS INDEX LEVELS
+    position = cube.index.names.index(level)
+    categories = cube.index.levels[position].rename(level)
+    return _bincount_sums(np.asarray(cube.index.codes[position]), categories, cube["sum"], columns)
+
+def worst(sums, kpi, n=TOP_N, min_denominator=MIN_DENOMINATOR):
+    # PARTIAL SELECTION OF THE n WORST WITH np.argpartition, ONLY THOSE n ARE SORTED
+    denominator = sum(sums[col] for col in kpi.denominator).to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.asarray(kpi.evaluate(sums), dtype=np.float64)
+    eligible = np.flatnonzero((denominator >= min_denominator) & np.isfinite(value))
+    badness = value[eligible] if kpi.higher_is_worse else -value[eligible]
+    if len(eligible) > n:
+        top = np.argpartition(-badness, n - 1)[:n]
+    else:
+        top = np.arange(len(eligible))
+    top = top[np.argsort(-badness[top], kind="stable")]
+    rows = eligible[top]
+    return pd.DataFrame({sums.index.name: sums.index[rows], kpi.key: value[rows], "denominator": denominator[rows]},
+                        index=pd.RangeIndex(1, len(rows) + 1, name="rank"))
+
+def rank_offenders(sums, kpis, n=TOP_N, min_denominator=MIN_DENOMINATOR):
+    return {kpi.key: worst(sums, kpi, n, min_denominator) for kpi in rankable(kpis)}
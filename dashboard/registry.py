@@ -0,0 +1,89 @@
+import pandas as pd
+
+from dashboard.kpi import Kpi, ratio
+
+# EACH ENTRY IS ONE CHART, column IS THE PAGE COLUMN IT IS DRAWN IN
+KPIS_2G = [
+    # COLUMN 1
+    Kpi("bts_count", "Count of Cell", counts=("BTS NAME",), column=0),
+    Kpi("total_payload", "Total Payload (MB)", sums=("2G Total Payload",), column=0),
+    ratio("sdsr_", "SDSR (%)", "Num SDSR", "Denum SDSR", column=0),
+    ratio("hosr_", "HOSR (%)", "Num HOSR", "Denum HOSR", column=0),
+    ratio("tbf_dl_sr_", "TBF Est DL SR (%)", "Num TBF DL SR", "Denum TBF DL SR", column=0),
+    Kpi("transport", "Tranport Received (DL) vs Send (UL)", means=("Received Speed(Kbps)", "Send Speed(Kbps)"), column=0),
+    Kpi("pd_pl_", "PD Packet Loss (%)",
+        numerator=("Number of sent path-detection request packets", "Number of replies received in the watch time"),
+        denominator=("Number of sent path-detection request packets",),
+        formula=lambda df_: (df_["Number of sent path-detection request packets"] - df_["Number of replies received in the watch time"]) / df_["Number of sent path-detection request packets"],
+        column=0, higher_is_worse=True),
+    # COLUMN 2
+    ratio("avails", "Availability (%)", "Num TCH Available", "Denum TCH Available", column=1),
+    Kpi("trx_num", "Number TRx", sums=("Number of TRX",), column=1),
+    ratio("sd_block_", "SD BLOCK (%)", "Num SD Blocking Rate", "Denum SD Blocking Rate", column=1, higher_is_worse=True),
+    ratio("tch_drop_", "TCH DROP (%)", "Num TCH Drop Rate", "Denum TCH Drop Rate", column=1, higher_is_worse=True),
+    ratio("tbf_ul_sr_", "TBF Est UL SR (%)", "Num TBF UL SR", "Denum TBF UL SR", column=1),
+    Kpi("retain_", "Retainability (%)",
+        numerator=("Num TBF Comp SR", "Denum TCH Drop Rate", "Num TCH Drop Rate"),
+        denominator=("Denum TBF Comp SR", "Denum TCH Drop Rate"),
+        formula=lambda df_: (df_["Num TBF Comp SR"] + df_["Denum TCH Drop Rate"] - df_["Num TCH Drop Rate"]) /
+                            (df_["Denum TBF Comp SR"] + df_["Denum TCH Drop Rate"]),
+        column=1),
+    Kpi("lat_jit", "Latency(ms) - Jitter(ms)", means=("Mean round-trip delay(ms)", "Mean delay jitter(ms)"), column=1),
+    # COLUMN 3
+    Kpi("tch_sd", "TCH and SD Traffic (Erl)", sums=("TCH Traffic (erl)", "SDCCH Traffic (erl)"), column=2),
+    Kpi("sdcch_seizure", "SDCCH Seizure Att",
+        sums=("Number of SDCCH seizure attempts for assignment(MOC)",
+              "Number of SDCCH seizure attempts for assignment(MTC)",
+              "Number of SDCCH seizure attempts for assignment(LOC)"),
+        column=2),
+    ratio("tch_block_", "TCH BLOCK (%)", "Num TCH Blocking Rate", "Denum TCH Blocking Rate", column=2, higher_is_worse=True),
+    ratio("tbf_comp_sr_", "TBF COMP SR (%)", "Num TBF Comp SR", "Denum TBF Comp SR", column=2),
+    Kpi("zero_avail", "Total of Zero Availability", sums=("ZeroAvail",), color="PROJECT", column=2),
+    ratio("access_", "Accessibility (%)",
+          ("Num SDSR", "Num TCH Blocking Rate", "Num TBF DL SR"),
+          ("Denum SDSR", "Denum TCH Blocking Rate", "Denum TBF DL SR"),
+          column=2),
+    Kpi("revenue", "Revenue (IDR)", sums=("REVENUE(IDR)",), column=2),
+]
+
+KPIS_4G = [
+    # COLUMN 1
+    ratio("avail2g", "Availability 2G", "AVAILABILITY 2G NUM", "AVAILABILITY 2G DENUM", column=0),
+    ratio("IFHO", "IFHO (%)", "Num IFHO SR NFJ", "Denum IFHO SR NFJ", column=0),
+    ratio("erabdrop", "E-RAB Drop (%)", "Num E-RAB Drop Rate NFJ", "Denum E-RAB Drop Rate NFJ", column=0, higher_is_worse=True),
+    Kpi("bts_count", "BTS Count", counts=("ManagedElement",), column=0),
+    Kpi("transport", "Transport Received (DL) vs Send (UL)", means=("Received Speed(Kbps)", "Send Speed(Kbps)"), column=0),
+    # COLUMN 2
+    Kpi("payload_ul_dl_tb", "Total Payload (TB)", sums=("Payload DL (MB)", "Payload UL (MB)"),
+        formula=lambda df_: pd.DataFrame({"payload_dl_tb": df_["Payload DL (MB)"] / 1048576,
+                                          "payload_ul_tb": df_["Payload UL (MB)"] / 1048576}),
+        y=("payload_dl_tb", "payload_ul_tb"),
+        column=1),
+    ratio("rrc_est_sr", "RRC Est SR (%)", "Num RRC Setup SR NFJ", "Denum RRC Setup SR NFJ", column=1),
+    ratio("csfbprep", "CSFB Prep SR (%)", "Num CSFB SR NFJ", "Denum CSFB SR NFJ", column=1),
+    ratio("s1signal", "S1 Signalling (%)", "S1 Signaling SR (NF) Num", "S1 Signaling SR (NF) Denum", column=1),
+    # COLUMN 3
+    ratio("accessibility", "Accessibility (%)",
+          ("Num E-RAB Setup SR NFJ", "Num RRC Setup SR NFJ"),
+          ("Denum E-RAB Setup SR NFJ", "Denum RRC Setup SR NFJ"),
+          column=2),
+    ratio("erabsr", "E-RAB SR (%)", "Num E-RAB Setup SR NFJ", "Denum E-RAB Setup SR NFJ", column=2),
+    ratio("dlprb", "DL PRB (%)", "DL PRB Utilization (%) NFJ Num", "DL PRB Utilization (%) NFJ Denum", column=2, higher_is_worse=True),
+    Kpi("zero_ava", "Total Zero Availability", sums=("Zero Avail",), column=2),
+    # COLUMN 4
+    Kpi("retainability", "Retainability (%)",
+        numerator=("Denum E-RAB Drop Rate NFJ", "Num E-RAB Drop Rate NFJ"),
+        denominator=("Denum E-RAB Drop Rate NFJ",),
+        formula=lambda df_: (df_["Denum E-RAB Drop Rate NFJ"] - df_["Num E-RAB Drop Rate NFJ"]) / df_["Denum E-RAB Drop Rate NFJ"],
+        column=3),
+    Kpi("rrc_user", "RRC User", sums=("[LTE]RRCConnectedUserLicenseUtilization Num_ranq",), column=3),
+    ratio("goodcqi", "Good CQI (%)", "CQI>=7 Num", "CQI>=7 Denum", column=3),
+    Kpi("pl_lat_jit_1", "PL(%) - Latency(ms) - Jitter(ms)",
+        means=("Packet Loss Rate (dst 1st)", "Avg Time Delay(ms)  (dst 1st)", "Avg Delay Jitter(ms)  (dst 1st)"),
+        column=3),
+    Kpi("pl_lat_jit_2", "PL(%) - Latency(ms) - Jitter(ms)",
+        means=("Packet Loss Rate (dst 2nd)", "Avg Time Delay(ms)  (dst 2nd)", "Avg Delay Jitter(ms)  (dst 2nd)"),
+        column=3),
+]
+
+KPIS = {"2G": KPIS_2G, "4G": KPIS_4G}
@@ -0,0 +1,166 @@
+import argparse
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from plotly.offline import get_plotlyjs
+
+from dashboard.charts import kpi_figure
+from dashboard.dataset import load_dataset
+from dashboard.kpi import DATE_COLUMN, derive
+from dashboard.technology import TECH_2G, TECH_4G
+
+logger = logging.getLogger(__name__)
+
+TECHNOLOGIES = {"2G": TECH_2G, "4G": TECH_4G}
+FORMATS = ("html", "png", "csv")
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title><script src="plotly.min.js"></script>
+<style>body{{font-family:sans-serif}} .grid{{display:grid;grid-template-columns:repeat({columns},1fr);gap:8px}}</style>
+</head><body><h1>{title}</h1><p>{subtitle}</p><div class="grid">{cells}</div></body></html>
+"""
+
+# SET IN EACH WORKER BY _init_worker, THE DATASET IS LOADED ONCE PER PROCESS
+_dataset = None
+
+
+def _init_worker(tech_name, file_path, compact, memory_map):
+    # THE PARENT HAS ALREADY BROUGHT THE STORE UP TO DATE IN THE SAME MODE, SO THIS ONLY READS IT (WITH
+    # memory_map THE WORKERS SHARE ITS PAGES)
+    global _dataset
+    _dataset = load_dataset(TECHNOLOGIES[tech_name], file_path, compact=compact, memory_map=memory_map)
+
+def report_name(selections):
+    # "REGIONAL=R1+R2_PROJECT=P1", OR "all" WITHOUT FILTERS
+    parts = [f"{col}={'+'.join(map(str, values))}" for col, values in selections.items() if len(values)]
+    return re.sub(r"[^\w=+.-]+", "_", "_".join(parts)) or "all"
+
+def filter_sets(dataset, by=None, filters_file=None):
+    # ONE SET PER VALUE OF A DIMENSION, OR THE LIST OF {column: [values]} OBJECTS IN A JSON FILE
+    if filters_file:
+        sets = json.loads(Path(filters_file).read_text())
+        return [{col: list(values) for col, values in selections.items()} for selections in sets]
+    if by:
+        return [{by: [value]} for value in dataset.option_index().categories[by]]
+    return [{}]
+
+def kpi_long_table(kpi_tables, kpis):
+    # EVERY KPI IN ONE TIDY TABLE: kpi, DATE, series, value
+    parts = []
+    for kpi in kpis:
+        table = kpi_tables[kpi.key]
+        if kpi.color:
+            long = table.rename(columns={kpi.y_columns[0]: "value", kpi.color: "series"})
+        else:
+            long = table.melt(id_vars=[DATE_COLUMN], value_vars=kpi.y_columns, var_name="series")
+        parts.append(long.assign(kpi=kpi.key)[["kpi", DATE_COLUMN, "series", "value"]])
+    return pd.concat(parts, ignore_index=True)
+
+def render_html(figures, kpis, path, title, subtitle):
+    columns = max(kpi.column for kpi in kpis) + 1
+    stacks = [[] for _ in range(columns)]
+    for kpi, fig in zip(kpis, figures):
+        stacks[kpi.column].append(fig.to_html(full_html=False, include_plotlyjs=False))
+    cells = "".join(f"<div>{''.join(stack)}</div>" for stack in stacks)
+    path.write_text(PAGE.format(title=title, subtitle=subtitle, columns=columns, cells=cells), encoding="utf-8")
+
+def render_report(task):
+    # RUNS IN A WORKER: QUERY, DERIVE AND WRITE ONE FILTER SET IN EVERY REQUESTED FORMAT
+    selections, date_start_filter, date_end_filter, formats, out_dir = task
+    dataset = _dataset
+    name = report_name(selections)
+    table = dataset.query(date_start_filter, date_end_filter, selections)
+    if len(table.index) == 0:
+        logger.warning("Filters %s result in an empty DataFrame, no report written", name)
+        return name, []
+    kpi_tables = derive(table, dataset.kpis)
+    out_dir = Path(out_dir)
+    written = []
+    if "csv" in formats:
+        path = out_dir / f"{name}.csv"
+        kpi_long_table(kpi_tables, dataset.kpis).to_csv(path, index=False)
+        written.append(path)
+    if "html" in formats or "png" in formats:
+        figures = [kpi_figure(kpi, kpi_tables[kpi.key]) for kpi in dataset.kpis]
+        if "html" in formats:
+            path = out_dir / f"{name}.html"
+            subtitle = f"{date_start_filter} to {date_end_filter}"
+            render_html(figures, dataset.kpis, path, f"{dataset.tech.name} Dashboard: {name}", subtitle)
+            written.append(path)
+        if "png" in formats:
+            png_dir = out_dir / name
+            png_dir.mkdir(exist_ok=True)
+            for kpi, fig in zip(dataset.kpis, figures):
+                path = png_dir / f"{kpi.column}-{kpi.key}.png"
+                fig.write_image(path)
+                written.append(path)
+    return name, written
+
+def check_formats(formats):
+    if "png" in formats:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            raise RuntimeError("PNG output needs the kaleido package: pip install kaleido")
+
+def render_reports(dataset, file_path, selections_list, date_start_filter=None, date_end_filter=None,
+                   formats=("html",), out_dir="reports", workers=None, compact=False, memory_map=False):
+    # dataset MUST COME FROM load_dataset(..., compact, memory_map) WITH THE SAME compact AND memory_map, SO THE
+    # STORE IS UP TO DATE AND THE WORKERS READ IT WITHOUT REWRITING IT
+    global _dataset
+    check_formats(formats)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if "html" in formats:
+        (out_dir / "plotly.min.js").write_text(get_plotlyjs(), encoding="utf-8")
+
+    first, last = dataset.date_range()
+    date_start_filter = pd.Timestamp(date_start_filter or first).date()
+    date_end_filter = pd.Timestamp(date_end_filter or last).date()
+    tasks = [(selections, date_start_filter, date_end_filter, tuple(formats), str(out_dir))
+             for selections in selections_list]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        _dataset = dataset
+        return [render_report(task) for task in tasks]
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(dataset.tech.name, file_path, compact, memory_map)) as pool:
+        return list(pool.map(render_report, tasks))
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the dashboard's KPI charts for many filter sets without Streamlit.")
+    parser.add_argument("--tech", required=True, choices=list(TECHNOLOGIES))
+    parser.add_argument("--source", default=None, help="CSV file or directory of daily CSVs (default: the page's file)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--by", help="one report per value of this filter column, e.g. REGIONAL")
+    group.add_argument("--filters", help='JSON file with a list of filter sets, e.g. [{"REGIONAL": ["R1"]}]')
+    parser.add_argument("--start", default=None, help="first day (default: first day in the data)")
+    parser.add_argument("--end", default=None, help="last day (default: last day in the data)")
+    parser.add_argument("--format", nargs="+", default=["html"], choices=FORMATS)
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--compact", action="store_true", help="read the store the way COMPACT_MODE pages write it")
+    parser.add_argument("--memory-map", action="store_true", help="read the store the way MEMORY_MAP pages write it")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    tech = TECHNOLOGIES[args.tech]
+    file_path = args.source or tech.file_path
+    if args.by and args.by not in tech.filter_columns:
+        parser.error(f"--by must be one of {', '.join(tech.filter_columns)}")
+    check_formats(args.format)
+    # THE STORE IS BROUGHT UP TO DATE ONCE HERE, IN THE PAGES' MODE SO NEITHER REWRITES IT FOR THE OTHER
+    dataset = load_dataset(tech, file_path, compact=args.compact, memory_map=args.memory_map)
+    selections_list = filter_sets(dataset, args.by, args.filters)
+    results = render_reports(dataset, file_path, selections_list, args.start, args.end, args.format, args.out,
+                             args.workers, args.compact, args.memory_map)
+    for name, written in results:
+        print(f"{name}: {len(written)} file(s)")
+
+if __name__ == "__main__":
+    main()
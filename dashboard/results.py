@@ -0,0 +1,123 @@
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from dashboard.instrument import cache_miss, stage
+from dashboard.kpi import derive
+
+logger = logging.getLogger(__name__)
+
+# PRESETS AND CONSTANTS
+MAX_BYTES = 256 * 2 ** 20
+# CHARGED FOR EVERY ENTRY ON TOP OF ITS KEY AND RESULT (THE DICT SLOT, THE LRU LINKS), SO EMPTY RESULTS
+# (None, FILTERS THAT MATCH NO ROWS) ARE EVICTED TOO INSTEAD OF PILING UP FOR FREE
+ENTRY_BYTES = 512
+# ONE ResultCache PER TECHNOLOGY AND PROCESS, SHARED BY THE PAGES AND THE PRE-WARMER
+_caches = {}
+_caches_guard = threading.Lock()
+
+
+def result_bytes(value):
+    # DEEP SIZE OF A KPI-TABLE DICT (OR ONE FRAME), None COSTS NOTHING
+    if value is None:
+        return 0
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, dict):
+        return sum(result_bytes(part) for part in value.values())
+    return 0
+
+def key_bytes(key):
+    # SHALLOW SIZES OF THE KEY AND OF EVERYTHING IN ITS NESTED TUPLES
+    if isinstance(key, tuple):
+        return sys.getsizeof(key) + sum(key_bytes(part) for part in key)
+    return sys.getsizeof(key)
+
+
+class ResultCache:
+    # LEAST-RECENTLY-USED RESULTS ARE EVICTED ONCE THE STORED RESULTS EXCEED max_bytes. SHARED BY EVERY SESSION OF
+    # THE PROCESS, SO LOOKUPS AND UPDATES HOLD A LOCK; A RESULT IS COMPUTED OUTSIDE IT
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        # (True, value) ON A HIT, (False, None) ON A MISS
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, self.entries[key][0]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        size = ENTRY_BYTES + key_bytes(key) + result_bytes(value)
+        if size > self.max_bytes:
+            logger.info("Result of %d bytes is larger than the whole cache, not stored", size)
+            return
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def lookup(self, key, compute):
+        found, value = self.get(key)
+        if not found:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "MB": round(self.bytes / 2 ** 20, 2),
+                    "limit MB": round(self.max_bytes / 2 ** 20, 2), "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions}
+
+def shared_cache(name, max_bytes=None):
+    # THE PROCESS-WIDE CACHE FOR name, CREATED ON FIRST USE; max_bytes (WHEN GIVEN) UPDATES ITS LIMIT
+    with _caches_guard:
+        cache = _caches.setdefault(name, ResultCache(max_bytes or MAX_BYTES))
+    if max_bytes is not None:
+        cache.max_bytes = max_bytes
+    return cache
+
+def cached_kpi_tables(cache, dataset, date_start_filter, date_end_filter, selections, granularity="D"):
+    # THE KPI TABLES (NOT FIGURES) FOR CANONICAL selections, KEYED BY THE DATASET VERSION, THE DATES AND granularity;
+    # None WHEN THE FILTERS MATCH NO ROWS. THE TABLES ARE SHARED BETWEEN SESSIONS AND ARE ONLY EVER READ
+    def compute():
+        cache_miss()
+        table = dataset.query(date_start_filter, date_end_filter, dict(selections), granularity)
+        if len(table.index) == 0:
+            return None
+        with stage("derive"):
+            return derive(table, dataset.kpis)
+
+    return cache.lookup((dataset.version, date_start_filter, date_end_filter, selections, granularity), compute)
+
+def cached_offenders(cache, dataset, date_start_filter, date_end_filter, selections, level, n, min_denominator):
+    # THE WORST-OFFENDER TABLES (SEE Dataset.offenders) IN THE SAME BOUNDED CACHE AS THE KPI TABLES
+    def compute():
+        cache_miss()
+        return dataset.offenders(date_start_filter, date_end_filter, dict(selections), level, n, min_denominator)
+
+    key = ("offenders", dataset.version, date_start_filter, date_end_filter, selections, level, n, min_denominator)
+    return cache.lookup(key, compute)
@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from dashboard.kpi import required_columns
+from dashboard.registry import KPIS
+
+
+@dataclass(frozen=True)
+class Schema:
+    # THE ONLY COLUMNS READ FROM THE EXPORT, GROUPED BY HOW clean_frame TREATS THEM
+    date_columns: tuple
+    filter_columns: tuple
+    percentage_columns: tuple
+    numeric_columns: tuple
+    # ONLY COUNTED (E.G. ManagedElement), KEPT AS THEY ARE
+    count_columns: tuple
+
+    @property
+    def columns(self):
+        return (self.date_columns + self.filter_columns + self.percentage_columns + self.numeric_columns
+                + self.count_columns)
+
+    @property
+    def dtype(self):
+        # PERCENTAGES ARE PARSED FROM TEXT ANYWAY, SKIP THE CSV READER'S TYPE INFERENCE ON THEM
+        return {col: str for col in self.percentage_columns}
+
+
+@lru_cache(maxsize=None)
+def build_schema(tech):
+    # DERIVED FROM THE KPI REGISTRY AND THE SIDEBAR, A COLUMN NO CHART OR FILTER USES IS NEVER PARSED
+    sums, means, counts, breakdowns = required_columns(KPIS[tech.name])
+    keys = set(tech.date_columns) | set(tech.filter_columns)
+    values = [col for col in dict.fromkeys(sums + means + breakdowns) if col not in keys]
+    return Schema(date_columns=tuple(tech.date_columns),
+                  filter_columns=tuple(tech.filter_columns),
+                  percentage_columns=tuple(col for col in tech.percentage_columns if col in values),
+                  numeric_columns=tuple(col for col in values if col not in tech.percentage_columns),
+                  count_columns=tuple(col for col in dict.fromkeys(counts) if col not in keys and col not in values))
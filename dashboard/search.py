@@ -0,0 +1,123 @@
+import re
+from dataclasses import dataclass
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# PRESETS AND CONSTANTS
+# AT MOST THIS MANY MATCHES ARE SENT TO THE BROWSER, HOWEVER MANY CELLS THERE ARE
+MATCH_LIMIT = 50
+# A SITE IS A CELL NAME WITHOUT ITS SECTOR SUFFIX (ONE OR TWO DIGITS), E.G. SITE000123_2 -> SITE000123;
+# CELL_00042 HAS NO SECTOR, SO NO SITE
+SECTOR_SUFFIX = re.compile(r"[_-]\d{1,2}$")
+# DIMENSIONS WHOSE VALUES CAN BE PICKED AS A WHOLE, EXPANDING TO THEIR CELLS
+GROUP_COLUMNS = ("Cluster",)
+# SUBSTRING SEARCH NEEDS AT LEAST ONE TRIGRAM, SHORTER TEXT ONLY MATCHES PREFIXES
+TRIGRAM = 3
+
+
+@dataclass(frozen=True)
+class CellIndex:
+    # EVERY SEARCHABLE ENTRY (A CELL, A SITE OR A GROUP VALUE) SORTED BY ITS CASE-FOLDED NAME, SO A PREFIX IS A
+    # BINARY-SEARCHED RANGE, PLUS THE ENTRIES OF EACH TRIGRAM FOR SUBSTRINGS
+    cells: pd.Index
+    keys: np.ndarray
+    labels: np.ndarray
+    # PER ENTRY, THE POSITIONS OF ITS CELLS IN cells
+    members: list
+    trigrams: dict
+    positions: dict
+
+def trigrams(key):
+    return {key[i:i + TRIGRAM] for i in range(len(key) - TRIGRAM + 1)}
+
+def _group_members(groups, cell_codes):
+    # (GROUP CODE, CELL CODE) PAIRS TO ONE SORTED ARRAY OF CELL CODES PER GROUP
+    order = np.lexsort((cell_codes, groups))
+    groups, cell_codes = groups[order], cell_codes[order]
+    bounds = np.flatnonzero(np.diff(groups)) + 1
+    return dict(zip(groups[np.r_[0, bounds]].tolist(), np.split(cell_codes, bounds))) if len(groups) else {}
+
+def build_cell_index(option_index, cell_column, group_columns=GROUP_COLUMNS):
+    # FROM THE OPTION INDEX (NOT THE ROWS), ONCE PER DATASET VERSION
+    cells = option_index.categories[cell_column]
+    names = pd.Series(cells.astype(str), dtype=object)
+    entries = [(name, name, np.array([i])) for i, name in enumerate(names)]
+
+    sites = names.str.replace(SECTOR_SUFFIX, "", regex=True)
+    has_site = (sites != names).to_numpy()
+    site_codes, site_names = pd.factorize(sites[has_site])
+    for code, members in _group_members(site_codes, np.flatnonzero(has_site)).items():
+        entries.append((site_names[code], f"{site_names[code]} (site, {len(members)} cells)", members))
+
+    cell_codes = option_index.codes[:, option_index.columns.index(cell_column)]
+    for col in group_columns:
+        if col not in option_index.columns:
+            continue
+        pairs = np.unique(np.column_stack([option_index.codes[:, option_index.columns.index(col)], cell_codes]), axis=0)
+        pairs = pairs[(pairs >= 0).all(axis=1)]
+        values = option_index.categories[col]
+        for code, members in _group_members(pairs[:, 0], pairs[:, 1]).items():
+            entries.append((str(values[code]), f"{values[code]} ({col.lower()}, {len(members)} cells)", members))
+
+    entries.sort(key=lambda entry: (entry[0].casefold(), entry[1]))
+    keys = np.array([name.casefold() for name, _, _ in entries], dtype=object)
+    labels = np.array([label for _, label, _ in entries], dtype=object)
+    postings = {}
+    for i, key in enumerate(keys):
+        for trigram in trigrams(key):
+            postings.setdefault(trigram, []).append(i)
+    return CellIndex(cells, keys, labels, [members for _, _, members in entries],
+                     {trigram: np.array(entries_, dtype=np.int64) for trigram, entries_ in postings.items()},
+                     {label: i for i, label in enumerate(labels)})
+
+def _prefix_range(index, key):
+    lo = np.searchsorted(index.keys, key, side="left")
+    hi = np.searchsorted(index.keys, key + "\U0010ffff", side="left")
+    return range(lo, hi)
+
+def _substring_entries(index, key):
+    # INTERSECTS THE POSTINGS FROM THE RAREST TRIGRAM UP, THEN CHECKS THE FEW CANDIDATES LEFT
+    if len(key) < TRIGRAM:
+        return
+    postings = sorted((index.trigrams.get(trigram, np.empty(0, dtype=np.int64)) for trigram in trigrams(key)), key=len)
+    candidates = postings[0]
+    for posting in postings[1:]:
+        if not len(candidates):
+            break
+        candidates = np.intersect1d(candidates, posting, assume_unique=True)
+    for i in candidates:
+        if not index.keys[i].startswith(key) and key in index.keys[i]:
+            yield i
+
+def search(index, text, allowed=None, limit=MATCH_LIMIT):
+    # THE FIRST limit LABELS MATCHING text: PREFIX MATCHES IN NAME ORDER (A SITE BEFORE ITS CELLS), THEN SUBSTRING
+    # MATCHES. allowed (A MASK OVER index.cells) HIDES ENTRIES WITHOUT AN ALLOWED CELL. THE WORK STOPS AT limit
+    key = text.strip().casefold()
+    if not key:
+        return []
+    found = []
+    for i in chain(_prefix_range(index, key), _substring_entries(index, key)):
+        if allowed is None or allowed[index.members[i]].any():
+            found.append(index.labels[i])
+            if len(found) == limit:
+                break
+    return found
+
+def expand(index, labels, allowed=None):
+    # THE CELL NAMES OF THE PICKED LABELS, A SITE OR GROUP BECOMING ITS (ALLOWED) CELLS
+    members = [index.members[index.positions[label]] for label in labels if label in index.positions]
+    if not members:
+        return []
+    codes = np.unique(np.concatenate(members))
+    if allowed is not None:
+        codes = codes[allowed[codes]]
+    return index.cells.take(codes).tolist()
+
+def allowed_cells(index, cells):
+    # MASK OVER index.cells OF THE CELLS THE OTHER FILTERS STILL LEAVE
+    positions = index.cells.get_indexer([cell for cell in cells if not pd.isna(cell)])
+    allowed = np.zeros(len(index.cells), dtype=bool)
+    allowed[positions[positions >= 0]] = True
+    return allowed
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+
+import pandas as pd
+
+from dashboard.cube import average_counts, period_days, rollup_periods
+from dashboard.filters import build_option_index
+from dashboard.ingest import (CACHE_DIR, CHUNK_BYTES, byte_ranges, complete_sizes, file_state, pending_reads,
+                              pipeline_key, read_clean, source_files, store_lock, store_path)
+from dashboard.instrument import stage
+from dashboard.kpi import DATE_COLUMN, required_columns
+from dashboard.matrix import build_matrix
+from dashboard.ranking import MIN_DENOMINATOR, TOP_N, rank_offenders, ranked_columns
+from dashboard.registry import KPIS
+from dashboard.technology import Technology
+
+logger = logging.getLogger(__name__)
+
+# PRESETS AND CONSTANTS
+TABLE = "rows"
+# DATES ARE STORED AS ISO TEXT, WHICH SORTS AND COMPARES LIKE THE TIMESTAMPS
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+INSERT_ROWS = 50_000
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _param(value):
+    # NUMPY SCALARS ARE NOT BOUND BY sqlite3
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.strftime(DATE_FORMAT)
+    return value
+
+def _day(date):
+    return pd.Timestamp(date).strftime(DATE_FORMAT)
+
+def _insert(con, df_, tech, create=False):
+    # CATEGORIES ARE WRITTEN AS THEIR VALUES, DATES AS TEXT, NaN AS NULL. executemany STAYS INSIDE THE CALLER'S
+    # TRANSACTION (to_sql WOULD COMMIT EVERY CALL, AND A HALF-WRITTEN APPEND WOULD BE REPEATED NEXT TIME)
+    df_ = df_.copy()
+    for col in tech.date_columns:
+        df_[col] = df_[col].dt.strftime(DATE_FORMAT)
+    if create:
+        con.execute(pd.io.sql.get_schema(df_, TABLE))
+    values = df_.astype(object).where(df_.notna(), None)
+    columns = ", ".join(_quote(col) for col in df_.columns)
+    marks = ", ".join("?" * len(df_.columns))
+    for start in range(0, len(values), INSERT_ROWS):
+        rows = values.iloc[start:start + INSERT_ROWS].itertuples(index=False, name=None)
+        con.executemany(f"INSERT INTO {TABLE} ({columns}) VALUES ({marks})", [tuple(map(_param, row)) for row in rows])
+
+def _read_manifest(con, tech):
+    try:
+        row = con.execute("SELECT value FROM manifest WHERE key = 'manifest'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    manifest = json.loads(row[0]) if row else None
+    if manifest is None or manifest.get("pipeline") != pipeline_key(tech):
+        return None
+    return manifest
+
+def refresh_sqlite(source, tech, cache_dir=CACHE_DIR, executor=None, chunk_bytes=CHUNK_BYTES):
+    # BRINGS THE SQLITE STORE UP TO DATE WITH THE SOURCE LIKE ingest.refresh (NEW FILES AND APPENDED ROWS ONLY),
+    # STREAMING chunk_bytes PIECES SO MEMORY DEPENDS ON THE CHUNK SIZE, NOT ON THE DATASET
+    path = store_path(source, tech, "sqlite", cache_dir)
+    with store_lock(path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # CUT AT THE LAST COMPLETE LINE, LIKE ingest.refresh
+        stats = {file_path: os.stat(file_path) for file_path in source_files(source)}
+        sizes = complete_sizes(stats)
+        with closing(sqlite3.connect(path)) as con:
+            manifest = _read_manifest(con, tech)
+            pending = pending_reads(stats, manifest, sizes) if manifest else None
+            if pending == []:
+                return path
+            if pending is None:
+                reads = [(file_path, 0, size) for file_path, size in sizes.items() if size]
+            else:
+                logger.info("Appending %s to %s", [f"{file_path}@{offset}" for file_path, offset in pending], path)
+                reads = [(file_path, offset, sizes[file_path]) for file_path, offset in pending]
+            chunks = [(file_path, start, stop) for file_path, offset, end in reads
+                      for start, stop in byte_ranges(file_path, offset, end, chunk_bytes)]
+            if executor:
+                paths, starts, stops = zip(*chunks)
+                frames = executor.map(read_clean, paths, [tech] * len(chunks), starts, stops)
+            else:
+                frames = (read_clean(file_path, tech, start, stop) for file_path, start, stop in chunks)
+            with con, stage("write sqlite"):
+                if pending is None:
+                    con.execute(f"DROP TABLE IF EXISTS {TABLE}")
+                for i, df_ in enumerate(frames):
+                    _insert(con, df_, tech, create=pending is None and i == 0)
+                if pending is None:
+                    # ONE INDEX ON THE DATE, AND ONE PER FILTER DIMENSION THAT ALSO SERVES ITS DATE RANGE
+                    con.execute(f"CREATE INDEX IF NOT EXISTS ix_date ON {TABLE} ({_quote(DATE_COLUMN)})")
+                    for i, col in enumerate(tech.filter_columns):
+                        con.execute(f"CREATE INDEX IF NOT EXISTS ix_dim_{i} ON {TABLE} "
+                                    f"({_quote(col)}, {_quote(DATE_COLUMN)})")
+                con.execute("CREATE TABLE IF NOT EXISTS manifest (key TEXT PRIMARY KEY, value TEXT)")
+                manifest = {"pipeline": pipeline_key(tech),
+                            "files": {str(file_path): file_state(file_path, stat, sizes[file_path])
+                                      for file_path, stat in stats.items()}}
+                con.execute("INSERT OR REPLACE INTO manifest VALUES ('manifest', ?)", (json.dumps(manifest),))
+            con.execute("ANALYZE")
+    return path
+
+
+# SAME QUERIES AS dataset.Dataset, BUT FILTERING AND AGGREGATION RUN AS SQL ON THE FILE: ONLY THE AGGREGATED
+# RESULT IS READ INTO PANDAS, SO MEMORY FOLLOWS THE RESULT SIZE INSTEAD OF THE DATASET SIZE
+@dataclass(frozen=True)
+class SqlDataset:
+    tech: Technology
+    version: str
+    path: str
+    memory: pd.DataFrame = None
+
+    @property
+    def kpis(self):
+        return KPIS[self.tech.name]
+
+    def _read(self, sql, params=()):
+        # ONE READ-ONLY CONNECTION PER QUERY, SO ANY THREAD CAN QUERY
+        with closing(sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)) as con:
+            return pd.read_sql_query(sql, con, params=[_param(value) for value in params])
+
+    def _where(self, date_start_filter, date_end_filter, selections):
+        clauses = [f"{_quote(DATE_COLUMN)} >= ?", f"{_quote(DATE_COLUMN)} <= ?"]
+        params = [_day(date_start_filter), _day(date_end_filter)]
+        for col, values in selections.items():
+            if not len(values):
+                continue
+            present = [value for value in values if not pd.isna(value)]
+            parts = []
+            if present:
+                parts.append(f"{_quote(col)} IN ({', '.join('?' * len(present))})")
+                params += present
+            if len(present) < len(values):
+                parts.append(f"{_quote(col)} IS NULL")
+            clauses.append(f"({' OR '.join(parts)})")
+        return " AND ".join(clauses), params
+
+    def _group_sums(self, keys, summed, counted, where, params, total=True):
+        # GROUP BY PUSHDOWN: TOTAL() IS 0 FOR AN ALL-NULL GROUP LIKE pandas sum(), SUM() KEEPS IT NULL
+        function = "TOTAL" if total else "SUM"
+        select = [_quote(key) for key in keys]
+        select += [f"{function}({_quote(col)})" for col in summed] + [f"COUNT({_quote(col)})" for col in counted]
+        group = ", ".join(_quote(key) for key in keys)
+        table = self._read(f"SELECT {', '.join(select)} FROM {TABLE} WHERE {where} GROUP BY {group} ORDER BY {group}",
+                           params)
+        table.columns = list(keys) + [("sum", col) for col in summed] + [("count", col) for col in counted]
+        if DATE_COLUMN in keys:
+            table[DATE_COLUMN] = pd.to_datetime(table[DATE_COLUMN])
+        table = table.set_index(list(keys))
+        table.columns = pd.MultiIndex.from_tuples(table.columns)
+        return table
+
+    def date_range(self):
+        first, last = self._read(f"SELECT MIN({_quote(DATE_COLUMN)}), MAX({_quote(DATE_COLUMN)}) FROM {TABLE}").iloc[0]
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def days(self, date_start_filter, date_end_filter):
+        where, params = self._where(date_start_filter, date_end_filter, {})
+        dates = self._read(f"SELECT DISTINCT {_quote(DATE_COLUMN)} FROM {TABLE} WHERE {where}", params)
+        return pd.to_datetime(dates.iloc[:, 0])
+
+    def option_index(self):
+        columns = ", ".join(_quote(col) for col in self.tech.filter_columns)
+        return build_option_index(self._read(f"SELECT DISTINCT {columns} FROM {TABLE}"), self.tech.filter_columns)
+
+    def query(self, date_start_filter, date_end_filter, selections, granularity="D"):
+        # PER DAY (AND PER BREAKDOWN COLUMN), ROLLED UP TO granularity IN PANDAS FROM THAT SMALL RESULT
+        sums, means, counts, breakdowns = required_columns(self.kpis)
+        keys = list(dict.fromkeys([DATE_COLUMN, *breakdowns]))
+        where, params = self._where(date_start_filter, date_end_filter, selections)
+        with stage("query: sqlite group by"):
+            table = self._group_sums(keys, list(dict.fromkeys(sums + means)), list(dict.fromkeys(counts + means)),
+                                     where, params)
+        if granularity == "D":
+            return table
+        days = period_days(self.days(date_start_filter, date_end_filter), date_start_filter, date_end_filter,
+                           granularity)
+        return average_counts(rollup_periods(table, granularity), self.kpis, days)
+
+    def offenders(self, date_start_filter, date_end_filter, selections, level, n=TOP_N, min_denominator=MIN_DENOMINATOR):
+        where, params = self._where(date_start_filter, date_end_filter, selections)
+        with stage("offenders: sqlite group by"):
+            sums = self._group_sums([level], ranked_columns(self.kpis), [], f"{where} AND {_quote(level)} IS NOT NULL",
+                                    params)
+        sums.columns = sums.columns.droplevel(0)
+        with stage("offenders: rank"):
+            return rank_offenders(sums, self.kpis, n, min_denominator)
+
+    def cells(self, date_start_filter, date_end_filter, selections):
+        where, params = self._where(date_start_filter, date_end_filter, selections)
+        cell = _quote(self.tech.cell_column)
+        return self._read(f"SELECT DISTINCT {cell} FROM {TABLE} WHERE {where} AND {cell} IS NOT NULL",
+                          params).iloc[:, 0].tolist()
+
+    def cell_matrix(self, columns):
+        # ONE ROW PER CELL AND DAY COMES BACK, SUM() LEAVES DAYS WITHOUT DATA AS NaN
+        first, last = self.date_range()
+        where, params = self._where(first, last, {})
+        keys = [self.tech.cell_column, DATE_COLUMN]
+        table = self._group_sums(keys, columns, [], f"{where} AND {_quote(keys[0])} IS NOT NULL", params, total=False)
+        table.columns = table.columns.droplevel(0)
+        return build_matrix(table.reset_index(), self.tech.cell_column, columns)
+
+def open_sqlite(tech, file_path, version, cache_dir=CACHE_DIR, executor=None, chunk_bytes=CHUNK_BYTES):
+    path = refresh_sqlite(file_path, tech, cache_dir, executor, chunk_bytes)
+    return SqlDataset(tech, version, str(path))
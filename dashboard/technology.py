@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Technology:
+    name: str
+    file_path: str
+    null_tokens: tuple
+    # ALSO TREAT WHITESPACE-ONLY TEXT AND TEXT CONTAINING A TOKEN AS NULL
+    null_blank: bool
+    null_contains: bool
+    percentage_columns: tuple
+    date_columns: tuple
+    chart_columns: tuple
+    filter_columns: tuple
+    cell_column: str
+    # THE LOW-CARDINALITY DIMENSIONS OF THE DAY x DIMENSION CUBE. A FILTER ON ANY OTHER COLUMN (THE CELL,
+    # Cluster, DESA, ...) READS THE ROWS: KEYED ON THOSE, THE CUBE WOULD HAVE ABOUT ONE ROW PER CELL AND DAY
+    cube_columns: tuple
+
+
+TECH_2G = Technology(
+    name="2G",
+    file_path="data/2G DASHBOARD_DAILY_NPI USO_2023.csv",
+    # REPLACE "", "NIL", AND "#N/A" wtih np.nan
+    null_tokens=("", "NIL", "#N/A", "0x2a", "-"),
+    null_blank=True,
+    null_contains=True,
+    percentage_columns=("TCH Available",
+                        "SDSR",
+                        "HOSR",
+                        "SD Blocking Rate",
+                        "TCH Drop Rate",
+                        "TBF DL SR",
+                        "TBF UL SR",
+                        "TBF Comp Rate",
+                        "TCH Blocking Rate",
+                        "Interference ICM [0-2]",
+                        "Interference ICM [3-5]",
+                        "PD Packet Loss Rate (%)",
+                        ),
+    date_columns=("Start Time", "End Time"),
+    chart_columns=("Num TCH Available",
+                   "Denum TCH Available",
+                   "Num SDSR",
+                   "Denum SDSR",
+                   "Num HOSR",
+                   "Denum HOSR",
+                   "Num SD Blocking Rate",
+                   "Denum SD Blocking Rate",
+                   "Num TCH Drop Rate",
+                   "Denum TCH Drop Rate",
+                   "Num TBF DL SR",
+                   "Denum TBF DL SR",
+                   "Num TBF UL SR",
+                   "Denum TBF UL SR",
+                   "Num TBF Comp SR",
+                   "Denum TBF Comp SR",
+                   "Num TCH Blocking Rate",
+                   "Denum TCH Blocking Rate",
+                   "TCH Traffic (erl)",
+                   "SDCCH Traffic (erl)",
+                   "2G Total Payload",
+                   "Number of sent path-detection request packets",
+                   "Number of replies received in the watch time",
+                   "Number of TRX",
+                   "Number of SDCCH seizure attempts for assignment(MOC)",
+                   "Number of SDCCH seizure attempts for assignment(MTC)",
+                   "Number of SDCCH seizure attempts for assignment(LOC)",
+                   "Mean round-trip delay(ms)",
+                   "Mean delay jitter(ms)",
+                   "Received Speed(Kbps)",
+                   "Send Speed(Kbps)",
+                   "REVENUE(IDR)"
+                   ),
+    filter_columns=("BTS NAME", "Vendor LC", "Vendor GS", "Cluster", "SUBNETWORK Name", "Spotbeam", "PROJECT", "TECHNOLOGY COLO", "Days per Week", "BTS VENDOR", "REGIONAL", "DESA"),
+    cell_column="BTS NAME",
+    cube_columns=("Vendor LC", "Vendor GS", "PROJECT", "BTS VENDOR", "REGIONAL"),
+)
+
+TECH_4G = Technology(
+    name="4G",
+    file_path="data/4G DASHBOARD_DAILY_NPI USO_2023.csv",
+    # REPLACE "", "NIL", AND "#N/A" wtih np.nan
+    null_tokens=("", "NIL", "#N/A", "0x2a", "-"),
+    null_blank=False,
+    null_contains=False,
+    percentage_columns=("[FDD]Cell Availability",
+                        "S1 Signaling SR (NF)",
+                        "RRC Setup SR (%) NFJ",
+                        "CSSR (%) NFJ", "E-RAB Setup SR (%) NFJ_1508983807242-6",
+                        "E-RAB Drop Rate (%) NFJ_1508918825286-9",
+                        "Ratio of RRC Re-establishment _monitor",
+                        "IFHO SR (%) NFJ",
+                        "CSFB SR (%) NFJ",
+                        "[LTE]S1-Signal Connection Establishment Success Rate",
+                        "DL PRB Utilization (%) NFJ",
+                        "UL PRB Utilization (%) NFJ",
+                        "[LTE]DL 64QAM Modulation Scheme Usage",
+                        "[LTE]DL 16QAM Modulation Scheme Usage",
+                        "the ratio of  CQI>=7_monitor",
+                        "DLResourceBlockUtilizingRate",
+                        "ULResourceBlockUtilizingRate",
+                        "[FDD]PDCCH CCE Utilization Rate",
+                        "[FDD]PUSCH PRB Utilization Rate",
+                        "[LTE]PRACH Usage",
+                        "Paging Congestion Rate",
+                        "paging success rate",
+                        "eNB Paging Success Rate",
+                        "[LTE]Paging Channel Usage",
+                        "RadioNetworkAvailabilityRate",
+                        "CQI>=7_(%)",
+                        "AVAILABILITY 2G",
+                        "Packet Loss Rate (dst 1st)",
+                        "Packet Loss Rate (dst 2nd)"
+                        ),
+    date_columns=("Start Time", "End Time"),
+    chart_columns=("AVAILABILITY 2G NUM",
+                   "AVAILABILITY 2G DENUM",
+                   "4G Payload (MByte) NFJ",
+                   "Num CSFB SR NFJ",
+                   "Denum CSFB SR NFJ",
+                   "Num E-RAB Drop Rate NFJ",
+                   "Denum E-RAB Drop Rate NFJ",
+                   "Num E-RAB Setup SR NFJ",
+                   "Denum E-RAB Setup SR NFJ",
+                   "Num RRC Setup SR NFJ",
+                   "Denum RRC Setup SR NFJ",
+                   "S1 Signaling SR (NF) Num",
+                   "S1 Signaling SR (NF) Denum",
+                   "Num IFHO SR NFJ",
+                   "Denum IFHO SR NFJ",
+                   "CQI>=7 Num",
+                   "CQI>=7 Denum",
+                   "DL PRB Utilization (%) NFJ Num",
+                   "DL PRB Utilization (%) NFJ Denum",
+                   "Payload UL (MB)",
+                   "Payload DL (MB)",
+                   "Cell Availability Num 4G",
+                   "Cell Availability Denum 4G"
+                   ),
+    filter_columns=("Cell Name", "Vendor LC", "Vendor GS", "Cluster", "Subnetwork Name", "Spotbeam", "PROJECT", "TECHNOLOGY COLO", "Days per Week", "BTS VENDOR", "REGIONAL"),
+    cell_column="Cell Name",
+    cube_columns=("Vendor LC", "Vendor GS", "PROJECT", "BTS VENDOR", "REGIONAL"),
+)
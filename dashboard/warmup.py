@@ -0,0 +1,82 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from dashboard.dataset import load_dataset
+from dashboard.ingest import CACHE_DIR, CHUNK_BYTES
+from dashboard.prewarm import Prewarmer, prewarm_sets
+from dashboard.results import shared_cache
+from dashboard.technology import TECH_2G, TECH_4G
+
+logger = logging.getLogger(__name__)
+
+TECHNOLOGIES = {"2G": TECH_2G, "4G": TECH_4G}
+# DEFAULT POOL SIZE LIMIT, EACH WORKER HOLDS A FEW CLEANED CHUNKS AND THE SERVER KEEPS SERVING MEANWHILE
+MAX_WORKERS = 4
+# THE POOL IS STARTED FROM A THREAD OF THE (MULTI-THREADED) SERVER: FORKING THERE COPIES LOCKS HELD BY OTHER
+# THREADS INTO THE CHILD, WHERE NOTHING WILL EVER RELEASE THEM, SO WORKERS ARE STARTED AS FRESH INTERPRETERS
+START_METHOD = "spawn"
+
+
+def warm_up(techs=(TECH_2G, TECH_4G), sources=None, workers=None, chunk_bytes=CHUNK_BYTES, memory_map=False,
+            cache_dir=CACHE_DIR, prewarm=False, backend="pandas", compact=False):
+    # BRINGS EVERY TECHNOLOGY'S STORE UP TO DATE AT ONCE: ONE THREAD PER TECHNOLOGY DRIVES ITS refresh, AND THE
+    # CHUNKS OF ALL FILES ARE CLEANED IN ONE SHARED PROCESS POOL, SO A COLD START TAKES ABOUT AS LONG AS THE
+    # SLOWEST CHUNK PLUS THE CONCATENATION INSTEAD OF THE SUM OF THE PIPELINES. WITH prewarm THE COMMON
+    # FILTER SETS ARE THEN COMPUTED INTO THE PROCESS'S RESULT CACHE, WHICH THE PAGES READ
+    sources = sources or {}
+    seconds = {}
+
+    def run(tech):
+        start = time.perf_counter()
+        file_path = sources.get(tech.name, tech.file_path)
+        dataset = load_dataset(tech, file_path, compact=compact, memory_map=memory_map, cache_dir=cache_dir,
+                               executor=pool, chunk_bytes=chunk_bytes, backend=backend)
+        seconds[tech.name] = time.perf_counter() - start
+        logger.info("Warmed up %s in %.1fs", tech.name, seconds[tech.name])
+        if prewarm:
+            Prewarmer(dataset, file_path, shared_cache(tech.name), prewarm_sets(dataset.option_index())).start().wait()
+
+    workers = workers or min(os.cpu_count() or 1, MAX_WORKERS)
+    context = multiprocessing.get_context(START_METHOD)
+    with ProcessPoolExecutor(workers, mp_context=context) as pool, ThreadPoolExecutor(len(techs)) as threads:
+        for future in [threads.submit(run, tech) for tech in techs]:
+            future.result()
+    return seconds
+
+def start_warm_up(techs=(TECH_2G, TECH_4G), **kwargs):
+    # RUNS warm_up IN A DAEMON THREAD SO THE CALLER (THE HOME PAGE) IS NOT BLOCKED; A PAGE OPENED MEANWHILE
+    # WAITS ON THE STORE LOCK IN refresh AND THEN READS THE FRESH STORE
+    def run():
+        try:
+            warm_up(techs, **kwargs)
+        except Exception:
+            logger.exception("Warm-up failed, the pages will ingest on first use")
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest and clean the 2G and 4G exports in parallel into the store the pages read.")
+    parser.add_argument("--tech", nargs="+", default=list(TECHNOLOGIES), choices=list(TECHNOLOGIES))
+    parser.add_argument("--workers", type=int, default=None, help=f"default: the CPU count, at most {MAX_WORKERS}")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES >> 20)
+    parser.add_argument("--memory-map", action="store_true", help="write the store the way MEMORY_MAP pages read it")
+    parser.add_argument("--compact", action="store_true", help="write the store the way COMPACT_MODE pages read it")
+    parser.add_argument("--backend", default="pandas", choices=["pandas", "sqlite"], help="the pages' BACKEND")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    techs = [TECHNOLOGIES[name] for name in args.tech]
+    seconds = warm_up(techs, workers=args.workers, chunk_bytes=args.chunk_mb << 20, memory_map=args.memory_map,
+                      backend=args.backend, compact=args.compact)
+    for name, elapsed in seconds.items():
+        print(f"{name}: {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,33 @@
 import streamlit as st
 
+from dashboard.warmup import start_warm_up
+
+# PRESETS AND CONSTANTS
+# INGEST AND CLEAN BOTH TECHNOLOGIES IN PARALLEL ON THE FIRST VISIT, SO NO DASHBOARD PAGE PAYS FOR A COLD START
+WARM_UP = True
+# THEN COMPUTE THE KPI TABLES OF THE COMMON FILTER SETS INTO THE RESULT CACHE THE PAGES READ
+PREWARM_MODE = True
+# MUST MATCH MEMORY_MAP OF THE PAGES, OTHERWISE THEIR FIRST LOAD REWRITES THE STORE
+MEMORY_MAP = False
+# MUST MATCH COMPACT_MODE OF THE PAGES, OTHERWISE THEIR FIRST LOAD REBUILDS THE STORE
+COMPACT_MODE = False
+# MUST MATCH BACKEND OF THE PAGES, "sqlite" BUILDS THEIR SQLITE STORE INSTEAD
+BACKEND = "pandas"
+
+# FUNCTIONS
+@st.cache_resource(show_spinner=False)
+def warm_up(memory_map, compact, prewarm, backend):
+    # ONCE PER SERVER PROCESS, IN A BACKGROUND THREAD
+    return start_warm_up(memory_map=memory_map, compact=compact, prewarm=prewarm, backend=backend)
+
 st.set_page_config(
     page_title="Home",
     page_icon="",
 )
 
+if WARM_UP:
+    warm_up(MEMORY_MAP, COMPACT_MODE, PREWARM_MODE, BACKEND)
+
 st.title("Home")
 st.sidebar.success("Select a page above")
 
@@ -1,313 +1,221 @@
-import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+import pandas as pd
 import streamlit as st
-import plotly.express as px
+
+from dashboard.charts import group_grid_figure, kpi_figure, kpi_grid_figure, kpi_groups
+from dashboard.cube import GRANULARITIES
+from dashboard.dataset import load_dataset
+from dashboard.filters import canonical_selections, cascade_options
+from dashboard.ingest import dataset_version
+from dashboard.instrument import cache_miss, finish_run, stage, start_run
+from dashboard.matrix import WINDOW, Z_THRESHOLD, anomalies
+from dashboard.ranking import MIN_DENOMINATOR, TOP_N, rankable, ranked_columns
+from dashboard.registry import KPIS_4G
+from dashboard.prewarm import Prewarmer, prewarm_sets
+from dashboard.results import cached_kpi_tables, cached_offenders, shared_cache
+from dashboard.search import allowed_cells, build_cell_index, expand, search
+from dashboard.technology import TECH_4G
 
 # PRESETS AND CONSTANTS
 pd.options.plotting.backend = "plotly"
 st.set_page_config(layout="wide")
 CHART_COL_NUMBER = 4
+# CATEGORICAL DIMENSIONS AND DOWNCAST KPI COLUMNS, LESS MEMORY PER PROCESS
+COMPACT_MODE = False
+# SERVE THE CLEANED FRAME FROM A MEMORY-MAPPED FILE SHARED BY ALL WORKER PROCESSES
+MEMORY_MAP = False
+# "pandas": THE ROWS ARE KEPT IN MEMORY, "sqlite": THEY STAY IN AN INDEXED SQLITE FILE AND EACH FILTER SET IS
+# A GROUP BY QUERY, SO MEMORY FOLLOWS THE RESULT SIZE (FOR DATASETS LARGER THAN RAM, COMPACT_MODE AND
+# MEMORY_MAP DO NOT APPLY)
+BACKEND = "pandas"
+# TIME, PEAK MEMORY AND CACHE HIT/MISS PER STAGE AND CHART, SHOWN IN THE SIDEBAR AND LOGGED AS JSON LINES
+PROFILE_MODE = False
+# "figures": ONE PLOTLY CHART PER KPI, "grid": ALL KPIS AS SUBPLOTS OF ONE FIGURE,
+# "tabs": ONE FIGURE PER PAGE COLUMN, ONLY THE SELECTED ONE IS SENT TO THE BROWSER
+CHART_MODE = "figures"
+# KPI AND WORST-OFFENDER TABLES OF RECENT FILTER SETS, SHARED BY ALL SESSIONS, LEAST RECENTLY USED EVICTED PAST THIS SIZE
+RESULT_CACHE_MB = 256
+# COMPUTED IN THE BACKGROUND AFTER EACH (RE)LOAD: THESE FILTER SETS AND EVERY SINGLE REGIONAL AND PROJECT
+# VALUE, FOR THE LAST DAY AND THE LAST WEEK, E.G. [{"REGIONAL": ["R1", "R2"], "PROJECT": ["P1"]}]
+PREWARM_MODE = True
+PREWARM_FILTERS = []
+# WORST-OFFENDER TABLE: WHAT IT CAN RANK BY, HOW MANY ROWS IT SHOWS
+OFFENDER_LEVELS = ("Cell Name", "Cluster")
+OFFENDER_COUNT = TOP_N
+# CELL x DAY ARRAYS OF THE KPI COUNTERS, FOR THE ANOMALOUS-CELLS TABLE (ONE EXTRA COPY OF THOSE COLUMNS IN MEMORY)
+CELL_MATRIX = False
 
 # FUNCTIONS
-@st.cache_data
-def import_files(file_path):
-    df_ = pd.read_csv(file_path)
-    return df_
-
-@st.cache_data
-def fix_columns_with_percentage(series):
-    series = (series.astype(str)
-              .apply(lambda x: float(x.replace("%", ""))/100 
-                    if x.endswith("%")
-                    else float(x)/100
-                    if float(x)>1
-                    else float(x)
-                    )
-            )
-    return series
-
-@st.cache_data
-def fix_date_columns(series):
-    series = series.apply(lambda x: (datetime(1899, 12, 30) + timedelta(days=int(x))).strftime("%d/%m/%Y"))
-    series = pd.to_datetime(series, dayfirst=True)
-    return series
-
-@st.cache_data
-def clean_used_columns(series):
-    series = series.astype(float)
-    return series
-
-def plot(df_, date_start_filter, date_end_filter, *args):
-    filter_list = ["Cell Name", "Vendor LC", "Vendor GS", "Cluster", "Subnetwork Name", "Spotbeam", "PROJECT", "TECHNOLOGY COLO", "Days per Week", "BTS VENDOR", "REGIONAL"]
-    filter = []
-    for i, (arg, col) in enumerate(zip(args, filter_list)):
-        print(i, arg, col)
-        if arg:
-            filter.append(arg)
-        else:
-            filter.append(df_[col].unique())
-
-    query = "(`Start Time` >= @date_start_filter) & (`Start Time` <= @date_end_filter) "
-    df_["Start Time"] = df_["Start Time"].dt.date
-    for i, elm in enumerate(filter_list):
-        query += f"& (`{elm}` in @filter[{i}]) "
-    query = query.rstrip()
-    df_ = df_.query(query)
-
-    if len(df_.index) == 0:
+@st.cache_resource(max_entries=1)
+def import_files(file_path, version, compact, memory_map, backend):
+    # ONE SHARED, READ-ONLY Dataset FOR ALL SESSIONS, REPLACED WHEN THE VERSION CHANGES
+    cache_miss()
+    dataset = load_dataset(TECH_4G, file_path, compact, memory_map, backend=backend)
+    return dataset
+
+def show_offenders(dataset, date_start_filter, date_end_filter, selections):
+    # EVERY RATIO KPI PER CELL OR CLUSTER OVER THE SAME WINDOW AND FILTERS AS THE CHARTS
+    st.markdown("---")
+    st.subheader("Worst Offenders")
+    kpis = {kpi.title: kpi for kpi in rankable(KPIS_4G)}
+    kpi_column, level_column, min_column = st.columns(3)
+    title = kpi_column.selectbox("KPI", list(kpis), key="offender_kpi", on_change=request_replot)
+    level = level_column.selectbox("Rank by", OFFENDER_LEVELS, key="offender_level", on_change=request_replot)
+    min_denominator = min_column.number_input("Minimum denominator", min_value=0, value=MIN_DENOMINATOR, step=10,
+                                              key="offender_min", on_change=request_replot)
+    with stage("compute_offenders", cached=True):
+        cache = shared_cache(TECH_4G.name, RESULT_CACHE_MB * 2 ** 20)
+        offenders = cached_offenders(cache, dataset, date_start_filter, date_end_filter, selections, level,
+                                     OFFENDER_COUNT, min_denominator)
+    st.dataframe(offenders[kpis[title].key], use_container_width=True)
+    return kpis[title], min_denominator
+
+@st.cache_resource(max_entries=1)
+def cell_matrix(_dataset, version):
+    # A CELL x DAY ARRAY PER RANKED COUNTER, THE ONE EXTRA COPY OF THOSE COLUMNS THAT CELL_MATRIX COSTS
+    cache_miss()
+    return _dataset.cell_matrix(ranked_columns(KPIS_4G))
+
+def show_anomalies(dataset, date_start_filter, date_end_filter, selections, kpi, min_denominator):
+    with stage("cell_matrix", cached=True):
+        matrix = cell_matrix(dataset, dataset.version)
+    rows = None
+    if any(len(values) for _, values in selections):
+        with stage("anomalies: filter rows"):
+            rows = matrix.cells.get_indexer(dataset.cells(date_start_filter, date_end_filter, dict(selections)))
+            rows = np.unique(rows[rows >= 0])
+    with stage("anomalies"):
+        flagged = anomalies(matrix, kpi, date_start_filter, date_end_filter, rows, min_denominator=min_denominator)
+    st.subheader(f"Anomalous Cells: {kpi.title}")
+    st.caption(f"Days at least {Z_THRESHOLD} standard deviations worse than the {WINDOW} days before them")
+    st.dataframe(flagged, use_container_width=True)
+
+def request_replot():
+    # CHANGING THE CHART GROUP OR THE OFFENDER TABLE RERUNS THE PAGE, THIS KEEPS THE CHARTS ON SCREEN
+    st.session_state["replot"] = True
+
+def plot(dataset, option_index, date_start_filter, date_end_filter, granularity, *args):
+    selections = canonical_selections(option_index, dict(zip(TECH_4G.filter_columns, args)))
+    with stage("compute_kpi_tables", cached=True):
+        cache = shared_cache(TECH_4G.name, RESULT_CACHE_MB * 2 ** 20)
+        kpi_tables = cached_kpi_tables(cache, dataset, date_start_filter, date_end_filter, selections,
+                                       GRANULARITIES[granularity])
+
+    if kpi_tables is None:
         st.warning("Filters result in empty DataFrame. Change the filters!")
     else:
-        col1, col2, col3, col4 = st.columns(CHART_COL_NUMBER)
-
-        with col1:
-            avail_2g = (df_
-                        .groupby("Start Time").agg({"AVAILABILITY 2G NUM":"sum", "AVAILABILITY 2G DENUM":"sum"})
-                        .reset_index()
-                        .assign(avail2g=lambda df_: df_["AVAILABILITY 2G NUM"]/df_["AVAILABILITY 2G DENUM"]))
-            fig = px.line(avail_2g, x="Start Time", y="avail2g", title="Availability 2G", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            ifho = (df_
-                    .groupby("Start Time").agg({"Num IFHO SR NFJ":"sum", "Denum IFHO SR NFJ":"sum"})
-                    .reset_index()
-                    .assign(IFHO=lambda df_: df_["Num IFHO SR NFJ"]/df_["Denum IFHO SR NFJ"]))
-            fig = px.line(ifho, x="Start Time", y="IFHO", title="IFHO (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            erab_drop = (df_
-                         .groupby("Start Time").agg({"Num E-RAB Drop Rate NFJ":"sum", "Denum E-RAB Drop Rate NFJ":"sum"})
-                         .reset_index()
-                         .assign(erabdrop=lambda df_:df_["Num E-RAB Drop Rate NFJ"]/df_["Denum E-RAB Drop Rate NFJ"]))
-            fig = px.line(erab_drop, x="Start Time", y="erabdrop", title="E-RAB Drop (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            bts_count = (df_
-                         .groupby("Start Time").agg({"ManagedElement":"count"})
-                         .reset_index())
-            fig = px.line(bts_count, x="Start Time", y="ManagedElement", title="BTS Count", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            tranpsort = (df_
-                     .groupby("Start Time").agg({"Received Speed(Kbps)":"mean", "Send Speed(Kbps)":"mean"})
-                     .reset_index())
-            fig = px.line(tranpsort, x="Start Time", y=["Received Speed(Kbps)", "Send Speed(Kbps)"], title="Transport Received (DL) vs Send (UL)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-        with col2:
-            payload_ul_dl_tb = (df_.assign(payload_dl_tb=lambda df_: df_["Payload DL (MB)"] / 1048576,
-                                        payload_ul_tb=lambda df_: df_["Payload UL (MB)"] / 1048576)
-                                .groupby("Start Time").agg({"payload_dl_tb":"sum", "payload_ul_tb":"sum"})
-                                .reset_index())
-            fig = px.line(payload_ul_dl_tb, x="Start Time", y=["payload_dl_tb", "payload_ul_tb"], title="Total Payload (TB)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            rrc_est = (df_
-                       .groupby("Start Time").agg({"Num RRC Setup SR NFJ":"sum", "Denum RRC Setup SR NFJ":"sum"})
-                       .reset_index()
-                       .assign(rrc_est_sr=lambda df_: df_["Num RRC Setup SR NFJ"]/df_["Denum RRC Setup SR NFJ"])) 
-            fig = px.line(rrc_est, x="Start Time", y="rrc_est_sr", title="RRC Est SR (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            csfb_prep = (df_
-                         .groupby("Start Time").agg({"Num CSFB SR NFJ":"sum", "Denum CSFB SR NFJ":"sum"})
-                         .reset_index()
-                         .assign(csfbprep=lambda df_: df_["Num CSFB SR NFJ"] / df_["Denum CSFB SR NFJ"]))
-            fig = px.line(csfb_prep, x="Start Time", y="csfbprep", title="CSFB Prep SR (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            s1_signal = (df_
-                         .groupby("Start Time").agg({"S1 Signaling SR (NF) Num":"sum", "S1 Signaling SR (NF) Denum":"sum"})
-                         .reset_index()
-                         .assign(s1signal=lambda df_: df_["S1 Signaling SR (NF) Num"] / df_["S1 Signaling SR (NF) Denum"]))
-            fig = px.line(s1_signal, x="Start Time", y="s1signal", title="S1 Signalling (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-        
-        with col3:
-            access = (df_.groupby("Start Time").agg({"Num E-RAB Setup SR NFJ":"sum", "Num RRC Setup SR NFJ":"sum", "Denum E-RAB Setup SR NFJ":"sum", "Denum RRC Setup SR NFJ":"sum"})
-                        .reset_index()
-                        .assign(accessibility=lambda df_: (df_["Num E-RAB Setup SR NFJ"]+df_["Num RRC Setup SR NFJ"]) / (df_["Denum E-RAB Setup SR NFJ"]+df_["Denum RRC Setup SR NFJ"])))
-            fig = px.line(access, x="Start Time", y="accessibility", title="Accessibility (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            erab_sr = (df_
-                       .groupby("Start Time").agg({"Num E-RAB Setup SR NFJ":"sum", "Denum E-RAB Setup SR NFJ":"sum"})
-                       .reset_index()
-                       .assign(erabsr=lambda df_: df_["Num E-RAB Setup SR NFJ"]/df_["Denum E-RAB Setup SR NFJ"])) 
-            fig = px.line(erab_sr, x="Start Time", y="erabsr", title="E-RAB SR (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            dl_prb = (df_
-                      .groupby("Start Time").agg({"DL PRB Utilization (%) NFJ Num":"sum", "DL PRB Utilization (%) NFJ Denum":"sum"})
-                      .reset_index()
-                      .assign(dlprb=lambda df_: df_["DL PRB Utilization (%) NFJ Num"] / df_["DL PRB Utilization (%) NFJ Denum"]))
-            fig = px.line(dl_prb, x="Start Time", y="dlprb", title="DL PRB (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            zero_ava = (df_
-                        .groupby("Start Time").agg({"Zero Avail":"sum"})
-                        .reset_index())
-            fig = px.line(zero_ava, x="Start Time", y="Zero Avail", title="Total Zero Availability", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-
-        with col4:
-            retain = (df_
-                    .groupby("Start Time").agg({"Denum E-RAB Drop Rate NFJ":"sum", "Num E-RAB Drop Rate NFJ":"sum"})
-                    .reset_index()
-                    .assign(retainability=lambda df_: (df_["Denum E-RAB Drop Rate NFJ"]-df_["Num E-RAB Drop Rate NFJ"]) / df_["Denum E-RAB Drop Rate NFJ"]))
-            fig = px.line(retain, x="Start Time", y="retainability", title="Retainability (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            rrc_user = (df_
-                        .groupby("Start Time").agg({"[LTE]RRCConnectedUserLicenseUtilization Num_ranq":"sum"})
-                        .reset_index())
-            fig = px.line(rrc_user, x="Start Time", y="[LTE]RRCConnectedUserLicenseUtilization Num_ranq", title="RRC User", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            good_cqi = (df_
-                        .groupby("Start Time").agg({"CQI>=7 Num":"sum", "CQI>=7 Denum":"sum"})
-                        .reset_index()
-                        .assign(goodcqi=lambda df_: df_["CQI>=7 Num"] / df_["CQI>=7 Denum"]))
-            fig = px.line(good_cqi, x="Start Time", y="goodcqi", title="Good CQI (%)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            pl_lat_jit_1 = (df_
-                            .groupby("Start Time").agg({"Packet Loss Rate (dst 1st)":"mean", "Avg Time Delay(ms)  (dst 1st)":"mean", "Avg Delay Jitter(ms)  (dst 1st)":"mean"})
-                            .reset_index())
-            fig = px.line(pl_lat_jit_1, x="Start Time", y=["Packet Loss Rate (dst 1st)", "Avg Time Delay(ms)  (dst 1st)", "Avg Delay Jitter(ms)  (dst 1st)"], title="PL(%) - Latency(ms) - Jitter(ms)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
-
-            pl_lat_jit_2 = (df_
-                .groupby("Start Time").agg({"Packet Loss Rate (dst 2nd)":"mean", "Avg Time Delay(ms)  (dst 2nd)":"mean", "Avg Delay Jitter(ms)  (dst 2nd)":"mean"})
-                .reset_index())
-            fig = px.line(pl_lat_jit_2, x="Start Time", y=["Packet Loss Rate (dst 2nd)", "Avg Time Delay(ms)  (dst 2nd)", "Avg Delay Jitter(ms)  (dst 2nd)"], title="PL(%) - Latency(ms) - Jitter(ms)", markers=True)
-            st.plotly_chart(fig, theme="streamlit", use_container_width=True)
+        if CHART_MODE == "grid":
+            with stage("chart: grid"):
+                fig = kpi_grid_figure(KPIS_4G, kpi_tables)
+                st.plotly_chart(fig, theme="streamlit", use_container_width=True)
+        elif CHART_MODE == "tabs":
+            groups = kpi_groups(KPIS_4G)
+            group = st.radio("Charts", list(groups), horizontal=True, key="chart_group", on_change=request_replot)
+            with stage(f"chart: {group}"):
+                fig = group_grid_figure(groups[group], kpi_tables)
+                st.plotly_chart(fig, theme="streamlit", use_container_width=True)
+        else:
+            # ONE FIGURE PER REGISTRY ENTRY, ALL DERIVED FROM THE AGGREGATED TABLE
+            columns = st.columns(CHART_COL_NUMBER)
+            for kpi in KPIS_4G:
+                with columns[kpi.column], stage(f"chart: {kpi.key}"):
+                    fig = kpi_figure(kpi, kpi_tables[kpi.key])
+                    st.plotly_chart(fig, theme="streamlit", use_container_width=True)
 
         st.success(f"Plot Berhasil Dibuat!")
-
-@st.cache_data
-def create_filter_list(df_):
-    min_date = df_["Start Time"].min()
-    max_date = df_["Start Time"].max()
-    cell_name_list = df_["Cell Name"].unique()
-    vendor_lc_list = df_["Vendor LC"].unique()
-    vendor_gs_list = df_["Vendor GS"].unique()
-    cluster_list = df_["Cluster"].unique()
-    subnetwork_name_list = df_["Subnetwork Name"].unique()
-    spotbeam_list = df_["Spotbeam"].unique()
-    project_list = df_["PROJECT"].unique()
-    technology_colo_list = df_["TECHNOLOGY COLO"].unique()
-    days_per_week_list = df_["Days per Week"].unique()
-    bts_vendor_list = df_["BTS VENDOR"].unique()
-    regional_list = df_["REGIONAL"].unique()
-    return (min_date, max_date, cell_name_list, vendor_lc_list, vendor_gs_list, cluster_list, subnetwork_name_list, spotbeam_list, 
-            project_list, technology_colo_list, days_per_week_list, bts_vendor_list, regional_list)
-
-def create_sidebar_filter(df_, min_date, max_date, cell_name_list, vendor_lc_list, vendor_gs_list, cluster_list, subnetwork_name_list, spotbeam_list, 
-            project_list, technology_colo_list, days_per_week_list, bts_vendor_list, regional_list):
-    # print(df_["Start Time"].min())
-    # print(type(df_["Start Time"].min()))
-    with st.sidebar.form("filter_form_sidebar"):
+        kpi, min_denominator = show_offenders(dataset, date_start_filter, date_end_filter, selections)
+        if CELL_MATRIX:
+            show_anomalies(dataset, date_start_filter, date_end_filter, selections, kpi, min_denominator)
+
+@st.cache_resource(max_entries=1)
+def create_filter_list(_dataset, version):
+    # ONE OptionIndex PER DATASET VERSION, SHARED BY ALL SESSIONS (cache_data WOULD PICKLE IT ON EVERY RERUN)
+    cache_miss()
+    min_date, max_date = _dataset.date_range()
+    option_index = _dataset.option_index()
+    return min_date, max_date, option_index
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def prewarm(_dataset, version, file_path, _option_index):
+    # ONCE PER DATASET VERSION, STOPS BY ITSELF WHEN THE VERSION CHANGES
+    cache = shared_cache(TECH_4G.name, RESULT_CACHE_MB * 2 ** 20)
+    return Prewarmer(_dataset, file_path, cache, prewarm_sets(_option_index, popular=PREWARM_FILTERS)).start()
+
+@st.cache_resource(max_entries=1)
+def cell_index(_option_index, version):
+    # THE SORTED NAMES AND TRIGRAMS OF EVERY CELL, SITE AND CLUSTER, BUILT FROM THE OPTION INDEX, NOT THE ROWS
+    cache_miss()
+    return build_cell_index(_option_index, TECH_4G.cell_column)
+
+def add_cells(index, allowed):
+    # A PICKED SITE OR CLUSTER EXPANDS TO ITS CELLS, WHICH THE NEXT RUN ADDS TO THE CELL NAME SELECTOR THROUGH ITS
+    # default (ITS KEY IS NEVER WRITTEN), THEN THE PICKER IS CLEARED FOR THE NEXT SEARCH
+    st.session_state["cell_additions"] = expand(index, st.session_state["cell_matches"], allowed)
+    st.session_state["cell_matches"] = []
+
+def create_sidebar_filter(dataset, min_date, max_date, option_index):
+    # NOT A FORM: EVERY CHANGE RERUNS SO THE OTHER SELECTORS CAN NARROW THEIR OPTIONS
+    selected = {col: st.session_state.get(col, []) for col in option_index.columns}
+    selected["Cell Name"] = list(dict.fromkeys(selected["Cell Name"] + st.session_state.pop("cell_additions", [])))
+    with stage("cascade_options"):
+        options = cascade_options(option_index, selected)
+    with stage("cell_index", cached=True):
+        index = cell_index(option_index, dataset.version)
+    with st.sidebar:
         date_start_filter = st.date_input("Start Time", key="date_start", value=max_date, min_value=min_date, max_value=max_date)
         date_end_filter = st.date_input("End Time", key="date_end", value=max_date, min_value=min_date, max_value=max_date)
-        # date_slider = st.slider("Date", value=(df_["Start Time"].min(), df_["Start Time"].max()), step=timedelta(days=1))
-        cell_name = st.multiselect("Cell Name", options=cell_name_list)
-        vendor_lc = st.multiselect("Vendor LC", key="vendor_lc", options=vendor_lc_list)
-        vendor_gs = st.multiselect("Vendor GS", options=vendor_gs_list)
-        cluster = st.multiselect("Cluster", options=cluster_list)
-        subnetwork_name = st.multiselect("Subnetwork Name", options=subnetwork_name_list)
-        spotbeam = st.multiselect("Spotbeam", options=spotbeam_list)
-        project = st.multiselect("Project", options=project_list)
-        technology_colo = st.multiselect("Technology COLO", options=technology_colo_list)
-        days_per_week = st.multiselect("Days per Week", options=days_per_week_list)
-        bts_vendor = st.multiselect("BTS Vendor", options=bts_vendor_list)
-        regional = st.multiselect("Regional", options=regional_list)
-        # text = st.text_input("Test") 
-        # st.text(f"{st.session_state.date_start} {st.session_state.date_end} {st.session_state.vendor_lc}")
-        filter_button = st.form_submit_button("Plot")
-    if filter_button:
-        plot(df_, date_start_filter, date_end_filter, cell_name, vendor_lc, vendor_gs, cluster, 
-            subnetwork_name, spotbeam, project, technology_colo, days_per_week, bts_vendor, regional)
+        # WEEKS AND MONTHS ARE SUMMED FROM THE DAILY COUNTERS, SO RATIOS STAY WEIGHTED
+        granularity = st.selectbox("Granularity", list(GRANULARITIES), key="granularity")
+        # ONLY THE TOP MATCHES OF THE SEARCH TEXT ARE SENT TO THE BROWSER, NOT EVERY CELL
+        cell_query = st.text_input("Search Cell / Site / Cluster", key="cell_query")
+        with stage("cell search"):
+            allowed = allowed_cells(index, options["Cell Name"])
+            matches = search(index, cell_query, allowed)
+        st.multiselect("Matches", options=matches, key="cell_matches", on_change=add_cells, args=(index, allowed))
+        # ITS OPTIONS ARE THE SELECTION ITSELF, SO REMOVING A CELL CHANGES THE WIDGET AND default KEEPS THE OTHERS
+        cell_name = st.multiselect("Cell Name", key="Cell Name", options=selected["Cell Name"], default=selected["Cell Name"])
+        vendor_lc = st.multiselect("Vendor LC", key="Vendor LC", options=options["Vendor LC"], default=selected["Vendor LC"])
+        vendor_gs = st.multiselect("Vendor GS", key="Vendor GS", options=options["Vendor GS"], default=selected["Vendor GS"])
+        cluster = st.multiselect("Cluster", key="Cluster", options=options["Cluster"], default=selected["Cluster"])
+        subnetwork_name = st.multiselect("Subnetwork Name", key="Subnetwork Name", options=options["Subnetwork Name"], default=selected["Subnetwork Name"])
+        spotbeam = st.multiselect("Spotbeam", key="Spotbeam", options=options["Spotbeam"], default=selected["Spotbeam"])
+        project = st.multiselect("Project", key="PROJECT", options=options["PROJECT"], default=selected["PROJECT"])
+        technology_colo = st.multiselect("Technology COLO", key="TECHNOLOGY COLO", options=options["TECHNOLOGY COLO"], default=selected["TECHNOLOGY COLO"])
+        days_per_week = st.multiselect("Days per Week", key="Days per Week", options=options["Days per Week"], default=selected["Days per Week"])
+        bts_vendor = st.multiselect("BTS Vendor", key="BTS VENDOR", options=options["BTS VENDOR"], default=selected["BTS VENDOR"])
+        regional = st.multiselect("Regional", key="REGIONAL", options=options["REGIONAL"], default=selected["REGIONAL"])
+        filter_button = st.button("Plot")
+    if filter_button or st.session_state.pop("replot", False):
+        plot(dataset, option_index, date_start_filter, date_end_filter, granularity, cell_name, vendor_lc, vendor_gs, cluster, subnetwork_name, spotbeam, project, technology_colo, days_per_week, bts_vendor, regional)
 
 def page_header():
     st.title("4G Dashboard")
     st.markdown("---")
 
 def main():
+    start_run(TECH_4G.name, enabled=PROFILE_MODE)
     # PAGE HEADER
     page_header()
-    # IMPORT FILE
-    df = import_files(file_path="data/4G DASHBOARD_DAILY_NPI USO_2023.csv")
-
-    # REPLACE "", "NIL", AND "#N/A" wtih np.nan
-    df = df.replace(["", "NIL", "#N/A", "0x2a", "-"], np.nan)
-
-    # FIX COLUMNS WITH PERCENTAGE
-    columns_with_percentage = ["[FDD]Cell Availability",
-                               "S1 Signaling SR (NF)",
-                               "RRC Setup SR (%) NFJ",
-                               "CSSR (%) NFJ", "E-RAB Setup SR (%) NFJ_1508983807242-6",
-                               "E-RAB Drop Rate (%) NFJ_1508918825286-9",
-                               "Ratio of RRC Re-establishment _monitor",
-                               "IFHO SR (%) NFJ",
-                               "CSFB SR (%) NFJ",
-                               "[LTE]S1-Signal Connection Establishment Success Rate",
-                               "DL PRB Utilization (%) NFJ",
-                               "UL PRB Utilization (%) NFJ",
-                               "[LTE]DL 64QAM Modulation Scheme Usage",
-                               "[LTE]DL 16QAM Modulation Scheme Usage",
-                               "the ratio of  CQI>=7_monitor",
-                               "DLResourceBlockUtilizingRate",
-                               "ULResourceBlockUtilizingRate",
-                               "[FDD]PDCCH CCE Utilization Rate",
-                               "[FDD]PUSCH PRB Utilization Rate",
-                               "[LTE]PRACH Usage",
-                               "Paging Congestion Rate",
-                               "paging success rate",
-                               "eNB Paging Success Rate",
-                               "[LTE]Paging Channel Usage",
-                               "RadioNetworkAvailabilityRate",
-                               "CQI>=7_(%)",
-                               "AVAILABILITY 2G",
-                               "Packet Loss Rate (dst 1st)",
-                               "Packet Loss Rate (dst 2nd)"
-                               ]
-    for col in columns_with_percentage:
-        df[col] = fix_columns_with_percentage(df[col])
-
-    # FIX COLUMNS WITH DATE
-    for col in ["Start Time", "End Time"]:
-        df[col] = fix_date_columns(df[col])
+    # IMPORT AND CLEAN FILE
+    file_path = TECH_4G.file_path
+    with stage("import_files", cached=True):
+        dataset = import_files(file_path=file_path, version=dataset_version(file_path, TECH_4G), compact=COMPACT_MODE,
+                               memory_map=MEMORY_MAP, backend=BACKEND)
 
-    # FIX COLUMNS NEEDED FOR CHARTS
-    columns_used_in_charts = ["AVAILABILITY 2G NUM",
-                              "AVAILABILITY 2G DENUM",
-                              "4G Payload (MByte) NFJ",
-                              "Num CSFB SR NFJ",
-                              "Denum CSFB SR NFJ",
-                              "Num E-RAB Drop Rate NFJ",
-                              "Denum E-RAB Drop Rate NFJ",
-                              "Num E-RAB Setup SR NFJ",
-                              "Denum E-RAB Setup SR NFJ",
-                              "Num RRC Setup SR NFJ",
-                              "Denum RRC Setup SR NFJ",
-                              "S1 Signaling SR (NF) Num",
-                              "S1 Signaling SR (NF) Denum",
-                              "Num IFHO SR NFJ",
-                              "Denum IFHO SR NFJ",
-                              "CQI>=7 Num",
-                              "CQI>=7 Denum",
-                              "DL PRB Utilization (%) NFJ Num",
-                              "DL PRB Utilization (%) NFJ Denum",
-                              "Payload UL (MB)",
-                              "Payload DL (MB)",
-                              "Cell Availability Num 4G",
-                              "Cell Availability Denum 4G"]
-    for col in columns_used_in_charts:
-        df[col] = clean_used_columns(df[col])
-    
     # CREATE SIDEBAR FILTER
-    create_sidebar_filter(df, *create_filter_list(df))
+    with stage("create_filter_list", cached=True):
+        filter_list = create_filter_list(dataset, dataset.version)
+    if PREWARM_MODE:
+        prewarm(dataset, dataset.version, file_path, filter_list[2])
+    create_sidebar_filter(dataset, *filter_list)
+    if dataset.memory is not None:
+        with st.sidebar.expander("Memory"):
+            st.dataframe(dataset.memory)
+    timings = finish_run()
+    if timings is not None:
+        with st.sidebar.expander("Timings"):
+            st.dataframe(timings)
+        with st.sidebar.expander("Result Cache"):
+            st.write(shared_cache(TECH_4G.name).stats())
 
 main()
\ No newline at end of file
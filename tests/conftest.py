@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from benchmarks.generate_data import generate
+from dashboard.technology import TECH_2G, TECH_4G
+
+# PRESETS AND CONSTANTS
+ROWS = 2000
+DAYS = 20
+
+
+@pytest.fixture(scope="session", params=[TECH_2G, TECH_4G], ids=lambda tech: tech.name)
+def tech(request):
+    return request.param
+
+@pytest.fixture(scope="session")
+def export(tech, tmp_path_factory):
+    # ONE SMALL SYNTHETIC EXPORT PER TECHNOLOGY, SHARED BY THE SESSION; TESTS THAT CHANGE IT COPY IT FIRST
+    return generate(tech, ROWS, tmp_path_factory.mktemp(tech.name) / "export.csv", days=DAYS)
@@ -0,0 +1,73 @@
+import dataclasses
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_pipeline import BACKENDS, bench_selections, check_tables, kpi_tables
+from dashboard.cube import GRANULARITIES
+from dashboard.dataset import load_dataset
+
+# THE TECHNOLOGY'S OWN CUBE IS NOT KEPT FOR A FEW CELLS, SO THOSE QUERIES READ THE ROWS; ONE OVER REGIONAL AND
+# PROJECT IS KEPT, SO DIMENSION SELECTIONS ARE ANSWERED FROM IT
+KEPT_CUBE = ("REGIONAL", "PROJECT")
+
+
+@pytest.fixture(scope="module", params=[None, KEPT_CUBE], ids=["default cube", "kept cube"])
+def datasets(request, tech, export, tmp_path_factory):
+    # ONE STORE PER BACKEND, SO NONE OF THEM REWRITES ANOTHER'S
+    tech = dataclasses.replace(tech, cube_columns=request.param or tech.cube_columns)
+    cache_dir = tmp_path_factory.mktemp(f"{tech.name}-stores")
+    return {name: load_dataset(tech, export, cache_dir=cache_dir / name, **options) for name, options in BACKENDS.items()}
+
+def selections(dataset):
+    # THE BENCHMARK'S SELECTIONS PLUS THE ROWS WITHOUT A PROJECT (NaN), ALONE AND WITH A VALUE
+    project = dataset.option_index().categories["PROJECT"][0]
+    regional = dataset.frame.loc[dataset.frame["PROJECT"].isna(), "REGIONAL"].iloc[0]
+    return {**bench_selections(dataset),
+            "no project": {"PROJECT": [np.nan]},
+            "project or none": {"PROJECT": [project, np.nan]},
+            "regional, no project": {"REGIONAL": [regional], "PROJECT": [np.nan]}}
+
+@pytest.mark.parametrize("freq", GRANULARITIES.values())
+@pytest.mark.parametrize("backend", [name for name in BACKENDS if name != "pandas"])
+def test_backends_give_the_same_kpi_tables(datasets, backend, freq):
+    for label, selection in selections(datasets["pandas"]).items():
+        expected = kpi_tables(datasets["pandas"], selection, freq)
+        assert expected
+        check_tables(expected, kpi_tables(datasets[backend], selection, freq), f"{backend}, {label}, {freq}")
+
+@pytest.mark.parametrize("freq", GRANULARITIES.values())
+def test_cube_answers_like_the_rows(datasets, freq):
+    dataset = datasets["pandas"]
+    if dataset.tech.cube_columns != KEPT_CUBE:
+        assert dataset.cube is None
+        return
+    rows_only = dataclasses.replace(dataset, cube=None)
+    answered = 0
+    for label, selection in selections(dataset).items():
+        answered += dataset._uses_cube(selection)
+        check_tables(kpi_tables(rows_only, selection, freq), kpi_tables(dataset, selection, freq), f"cube, {label}, {freq}")
+    # EVERYTHING BUT THE CELL SELECTION COMES FROM THE CUBE
+    assert answered == len(selections(dataset)) - 1
+
+def test_cube_ranks_like_the_rows(datasets):
+    dataset = datasets["pandas"]
+    if dataset.cube is None:
+        pytest.skip("no cube kept")
+    rows_only = dataclasses.replace(dataset, cube=None)
+    first, last = dataset.date_range()
+    for selection in selections(dataset).values():
+        expected = rows_only.offenders(first, last, selection, "REGIONAL")
+        actual = dataset.offenders(first, last, selection, "REGIONAL")
+        assert list(actual) == list(expected)
+        for key in expected:
+            pd.testing.assert_frame_equal(actual[key], expected[key], check_dtype=False, check_categorical=False)
+
+def test_check_tables_catches_a_difference(datasets):
+    expected = kpi_tables(datasets["pandas"], {}, "D")
+    changed = {key: table.copy() for key, table in expected.items()}
+    key = next(iter(changed))
+    changed[key].iloc[0, -1] = changed[key].iloc[0, -1] * 1.01 + 1
+    with pytest.raises(AssertionError):
+        check_tables(expected, changed, "changed")
@@ -0,0 +1,18 @@
+from dashboard.charts import kpi_grid_figure
+from dashboard.dataset import load_dataset
+from dashboard.kpi import derive
+
+
+def test_multi_series_subplots_have_a_legend(tech, export, tmp_path):
+    dataset = load_dataset(tech, export, cache_dir=tmp_path)
+    tables = derive(dataset.query(*dataset.date_range(), {}), dataset.kpis)
+    fig = kpi_grid_figure(dataset.kpis, tables)
+    for kpi in dataset.kpis:
+        traces = [trace for trace in fig.data if trace.legendgroup == kpi.key]
+        if len(traces) > 1:
+            assert all(trace.showlegend for trace in traces), kpi.title
+            assert {trace.legendgrouptitle.text for trace in traces} == {kpi.title}
+            assert len({trace.name for trace in traces}) == len(traces)
+        else:
+            assert not traces[0].showlegend, kpi.title
+    assert any(trace.showlegend for trace in fig.data)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_percentage import fix_columns_with_percentage_legacy, make_frame
+from dashboard.cleaning import fix_columns_with_percentage, fix_date_columns
+
+
+def test_percentages_match_the_legacy_parser():
+    # "12.5%", "12.5", "0.125" AND MISSING VALUES, WHICH THE LEGACY PARSER ALSO ACCEPTS
+    df_ = make_frame(2000, 3)
+    expected = pd.DataFrame({col: fix_columns_with_percentage_legacy(df_[col]) for col in df_.columns})
+    pd.testing.assert_frame_equal(fix_columns_with_percentage(df_), expected, check_exact=True)
+
+@pytest.mark.parametrize("text, value", [
+    ("12.5%", 0.125), ("100%", 1.0), ("0%", 0.0), ("12.5", 0.125), ("0.125", 0.125),
+    ("1", 1.0), ("1.5", 0.015), ("-5%", -0.05), ("1e1", 0.1),
+])
+def test_percentage_text_agrees_with_the_legacy_parser(text, value):
+    series = pd.Series([text], dtype=object)
+    assert fix_columns_with_percentage(series).iloc[0] == pytest.approx(value)
+    assert fix_columns_with_percentage_legacy(series).iloc[0] == pytest.approx(value)
+
+def test_whitespace_around_the_number_and_sign_is_ignored():
+    assert fix_columns_with_percentage(pd.Series([" 12.5 % ", "\t0.5\n"])).tolist() == [0.125, 0.5]
+
+@pytest.mark.parametrize("text", ["", "  ", "NIL", "#N/A", "0x2a", "-", "abc", "12.5%%x", "%", None, np.nan])
+def test_blanks_tokens_and_bad_values_become_nan(text):
+    # THE LEGACY PARSER RAISED ON THESE
+    series = pd.Series(["50%", text, "0.5"], dtype=object)
+    assert fix_columns_with_percentage(series).tolist()[::2] == [0.5, 0.5]
+    assert np.isnan(fix_columns_with_percentage(series).iloc[1])
+
+def test_numeric_and_text_columns_together():
+    df_ = pd.DataFrame({"text": ["50%", "NIL", "0.25"], "number": [50.0, np.nan, 0.25]})
+    expected = pd.DataFrame({"text": [0.5, np.nan, 0.25], "number": [0.5, np.nan, 0.25]})
+    pd.testing.assert_frame_equal(fix_columns_with_percentage(df_), expected)
+
+def test_excel_serials_drop_the_time_of_day():
+    series = pd.Series([44927, 44927.99931, 44958.5, np.nan])
+    expected = pd.Series(pd.to_datetime(["2023-01-01", "2023-01-01", "2023-02-01", None]))
+    pd.testing.assert_series_equal(fix_date_columns(series), expected)
+
+def test_serials_read_as_text():
+    series = pd.Series(["44927", "44927.99931", None], dtype=object)
+    expected = pd.Series(pd.to_datetime(["2023-01-01", "2023-01-01", None]))
+    pd.testing.assert_series_equal(fix_date_columns(series), expected)
+
+def test_parsed_dates_are_kept():
+    series = pd.Series(pd.to_datetime(["2023-01-01 10:30", "2023-01-02"]))
+    assert fix_date_columns(series) is series
+
+def test_text_dates_are_day_first():
+    series = pd.Series(["31/01/2023", "01/02/2023", None], dtype=object)
+    expected = pd.Series(pd.to_datetime(["2023-01-31", "2023-02-01", None]))
+    pd.testing.assert_series_equal(fix_date_columns(series), expected)
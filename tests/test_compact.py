@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.compact import downcast_numeric
+from dashboard.dataset import load_dataset
+from dashboard.schema import build_schema
+
+
+@pytest.mark.parametrize("values, dtype", [
+    ([1.0, 2.0, 3.0], "int32"),
+    ([0.5, 0.25, np.nan], "float32"),
+    ([123456789.37, 1.0], "float64"),
+    ([0.1, 0.2], "float64"),
+    ([1e300, 1.0], "float64"),
+])
+def test_downcast_keeps_every_value(values, dtype):
+    series = pd.Series(values, dtype="float64")
+    downcast = downcast_numeric(series)
+    assert downcast.dtype == dtype
+    assert np.array_equal(downcast.to_numpy(dtype=float), series.to_numpy(), equal_nan=True)
+
+@pytest.mark.parametrize("memory_map", [False, True], ids=["feather", "memory_map"])
+def test_store_is_written_compacted(tech, export, tmp_path, memory_map):
+    plain = load_dataset(tech, export, cache_dir=tmp_path / "plain")
+    first = load_dataset(tech, export, compact=True, memory_map=memory_map, cache_dir=tmp_path / "compact")
+    # THE SECOND LOAD READS THE COMPACTED STORE AS IT IS, WITH THE REPORT OF THE COMPACTION THAT WROTE IT
+    second = load_dataset(tech, export, compact=True, memory_map=memory_map, cache_dir=tmp_path / "compact")
+    numeric = list(build_schema(tech).numeric_columns)
+    for dataset in (first, second):
+        assert dataset.memory.loc["TOTAL", "bytes after"] < dataset.memory.loc["TOTAL", "bytes before"]
+        assert (dataset.frame.dtypes[numeric] != "float64").any()
+        pd.testing.assert_frame_equal(dataset.frame[numeric].astype(float), plain.frame[numeric].astype(float))
+    assert (second.frame.dtypes == first.frame.dtypes).all()
+    assert plain.memory is None
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.filters import build_option_index, canonical_selections, cascade_options
+
+# R1 HAS CLUSTERS A AND B, R2 HAS C AND A ROW WITHOUT A CLUSTER; VENDOR X IS ONLY IN R1
+ROWS = pd.DataFrame({
+    "REGIONAL": ["R1", "R1", "R1", "R2", "R2"],
+    "Cluster": ["A", "B", "B", "C", np.nan],
+    "Vendor": ["X", "X", "Y", "Y", "Y"],
+})
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_option_index(ROWS, ["REGIONAL", "Cluster", "Vendor"])
+
+def _same(options, expected):
+    assert {col: [str(value) for value in values] for col, values in options.items()} == expected
+
+def test_no_selection_lists_every_value(index):
+    _same(cascade_options(index, {}), {"REGIONAL": ["R1", "R2"], "Cluster": ["A", "B", "C", "nan"],
+                                       "Vendor": ["X", "Y"]})
+
+def test_other_selections_narrow_a_dimension_but_not_its_own(index):
+    _same(cascade_options(index, {"REGIONAL": ["R1"]}), {"REGIONAL": ["R1", "R2"], "Cluster": ["A", "B"],
+                                                         "Vendor": ["X", "Y"]})
+    _same(cascade_options(index, {"REGIONAL": ["R2"], "Vendor": ["Y"]}),
+          {"REGIONAL": ["R1", "R2"], "Cluster": ["C", "nan"], "Vendor": ["Y"]})
+
+def test_nan_is_an_option_and_a_selection(index):
+    _same(cascade_options(index, {"Cluster": [np.nan]}), {"REGIONAL": ["R2"], "Cluster": ["A", "B", "C", "nan"],
+                                                          "Vendor": ["Y"]})
+
+def test_a_chosen_value_is_kept_when_nothing_co_occurs(index):
+    # VENDOR X AND R2 NEVER MEET: EVERY OTHER DIMENSION IS EMPTY, THE CHOSEN VALUES STAY LISTED
+    _same(cascade_options(index, {"REGIONAL": ["R2"], "Vendor": ["X"]}),
+          {"REGIONAL": ["R1", "R2"], "Cluster": [], "Vendor": ["Y", "X"]})
+
+def test_canonical_selections_are_sorted_and_hashable(index):
+    key = canonical_selections(index, {"Cluster": ["B", "A", "A"], "REGIONAL": ["R1", "R2"], "Vendor": []})
+    assert key == (("Cluster", ("A", "B")),)
+    hash(key)
+
+def test_selections_that_filter_nothing_are_dropped(index):
+    assert canonical_selections(index, {}) == ()
+    assert canonical_selections(index, {"Vendor": ["X", "Y"]}) == ()
+    # CLUSTERS A AND B ARE ALL IN R1, SO REGIONAL (CHECKED FIRST) FILTERS NOTHING MORE
+    assert canonical_selections(index, {"REGIONAL": ["R1"], "Cluster": ["A", "B"]}) == (("Cluster", ("A", "B")),)
+    assert canonical_selections(index, {"Cluster": ["B", "A"], "REGIONAL": ["R1"]}) == (("Cluster", ("A", "B")),)
+    assert canonical_selections(index, {"REGIONAL": ["R2"], "Cluster": ["C"]}) == (("Cluster", ("C",)),)
+    # BOTH STAY WHEN EACH LEAVES OUT A VALUE THAT CO-OCCURS WITH THE OTHER
+    assert canonical_selections(index, {"Vendor": ["Y"], "REGIONAL": ["R1"]}) == \
+        (("REGIONAL", ("R1",)), ("Vendor", ("Y",)))
+
+def test_nan_selections_keep_their_own_key(index):
+    assert canonical_selections(index, {"Cluster": [np.nan]}) == (("Cluster", (np.nan,)),)
+    assert canonical_selections(index, {"REGIONAL": ["R2"], "Cluster": ["C", np.nan]}) == \
+        (("Cluster", ("C", np.nan)),)
+    assert canonical_selections(index, {"REGIONAL": ["R2"], "Vendor": ["Y"], "Cluster": []}) == (("REGIONAL", ("R2",)),)
+
+def test_an_empty_intersection_keeps_both_selections(index):
+    # NOTHING MATCHES, WHICH IS NOT THE SAME AS NOT FILTERING
+    key = canonical_selections(index, {"REGIONAL": ["R2"], "Vendor": ["X"]})
+    assert key == (("REGIONAL", ("R2",)), ("Vendor", ("X",)))
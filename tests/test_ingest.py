@@ -0,0 +1,71 @@
+import dataclasses
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+from dashboard.ingest import refresh
+from dashboard.sqlstore import TABLE, refresh_sqlite
+
+
+def _write_in_parts(export, path, cuts):
+    # THE EXPORT AS A FILE THAT GROWS THROUGH cuts (BYTE OFFSETS), YIELDING AFTER EACH PART
+    data = export.read_bytes()
+    path.write_bytes(b"")
+    written = 0
+    for cut in [*cuts, len(data)]:
+        with open(path, "ab") as file:
+            file.write(data[written:cut])
+        written = cut
+        yield
+
+def _half_line_cuts(export):
+    # A COMPLETE LINE A THIRD OF THE WAY IN, THEN THE MIDDLE OF A LINE TWO THIRDS OF THE WAY IN
+    data = export.read_bytes()
+    whole = data.index(b"\n", len(data) // 3) + 1
+    half = data.index(b"\n", 2 * len(data) // 3) - 10
+    return [whole, half]
+
+# THE TECHNOLOGY'S OWN CUBE IS NOT KEPT FOR A FEW CELLS, ONE OVER REGIONAL ONLY IS
+@pytest.mark.parametrize("cube_columns", [None, ("REGIONAL",)], ids=["default cube", "REGIONAL cube"])
+def test_half_written_line_waits_for_the_next_refresh(tech, export, tmp_path, cube_columns):
+    tech = dataclasses.replace(tech, cube_columns=cube_columns or tech.cube_columns)
+    path = tmp_path / "growing.csv"
+    for _ in _write_in_parts(export, path, _half_line_cuts(export)):
+        df_, cube = refresh(path, tech, tmp_path / "cache")
+        # NO ROW IS MADE OF A PARTIAL LINE
+        assert df_[list(tech.filter_columns[1:4])].notna().all(axis=None)
+    expected, expected_cube = refresh(export, tech, tmp_path / "rebuild")
+    pd.testing.assert_frame_equal(df_, expected)
+    assert (cube is None) == (expected_cube is None) == (cube_columns is None)
+    if cube is not None:
+        # THE SAME GROUPS; A MERGED CUBE MAY ORDER A DAY'S NaN GROUP DIFFERENTLY
+        pd.testing.assert_frame_equal(cube.sort_index(), expected_cube.sort_index())
+
+def test_half_written_line_is_not_recorded_as_ingested(tech, export, tmp_path):
+    path = tmp_path / "growing.csv"
+    cuts = _half_line_cuts(export)
+    parts = _write_in_parts(export, path, cuts)
+    next(parts)
+    next(parts)
+    df_, _ = refresh(path, tech, tmp_path / "cache")
+    # THE SAME HALF LINE AGAIN: NOTHING NEW AND NO ParserError
+    df_again, _ = refresh(path, tech, tmp_path / "cache")
+    pd.testing.assert_frame_equal(df_again, df_)
+    complete = tmp_path / "complete.csv"
+    data = export.read_bytes()
+    complete.write_bytes(data[:data.rindex(b"\n", 0, cuts[1]) + 1])
+    pd.testing.assert_frame_equal(df_, refresh(complete, tech, tmp_path / "rebuild")[0])
+
+def _sqlite_rows(path):
+    with closing(sqlite3.connect(path)) as con:
+        return pd.read_sql_query(f"SELECT * FROM {TABLE}", con)
+
+def test_sqlite_store_waits_for_the_rest_of_a_line(tech, export, tmp_path):
+    path = tmp_path / "growing.csv"
+    for _ in _write_in_parts(export, path, _half_line_cuts(export)):
+        store = refresh_sqlite(path, tech, tmp_path / "cache")
+        # A SECOND REFRESH ON THE SAME BYTES NEITHER FAILS NOR INSERTS ANYTHING
+        assert len(_sqlite_rows(refresh_sqlite(path, tech, tmp_path / "cache"))) == len(_sqlite_rows(store))
+    pd.testing.assert_frame_equal(_sqlite_rows(store), _sqlite_rows(refresh_sqlite(export, tech, tmp_path / "rebuild")))
@@ -0,0 +1,66 @@
+import json
+import logging
+import threading
+import tracemalloc
+
+import numpy as np
+
+from dashboard import instrument
+from dashboard.instrument import cache_miss, finish_run, stage, start_run
+
+
+def test_finishing_one_run_keeps_tracing_for_the_others():
+    allocated, finished = threading.Event(), threading.Event()
+    timings = {}
+
+    def short_run():
+        start_run("short")
+        allocated.wait()
+        finish_run()
+        finished.set()
+
+    def long_run():
+        start_run("long")
+        with stage("allocate"):
+            data = np.ones(50 * 2 ** 20, dtype=np.uint8)
+            allocated.set()
+            finished.wait()
+            data += 1
+        timings["long"] = finish_run()
+
+    threads = [threading.Thread(target=short_run), threading.Thread(target=long_run)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert timings["long"].set_index("stage").loc["allocate", "peak_mb"] >= 50
+    assert not tracemalloc.is_tracing()
+
+def test_every_stage_logs_one_json_line(caplog):
+    caplog.set_level(logging.INFO, logger="dashboard.instrument")
+    start_run("page", memory=False)
+    with stage("outer", cached=True):
+        with stage("inner"):
+            cache_miss()
+    with stage("last"):
+        pass
+    timings = finish_run()
+    lines = [json.loads(record.getMessage()) for record in caplog.records if record.name == "dashboard.instrument"]
+    assert sorted(line["stage"] for line in lines) == ["inner", "last", "outer"]
+    assert {line["stage"]: line["cache"] for line in lines} == {"outer": "hit", "inner": "miss", "last": None}
+    assert len({line["run"] for line in lines}) == 1
+    assert len(timings) == 3
+
+def test_stages_are_logged_without_logging_configured(capsys, monkeypatch):
+    # LIKE A STREAMLIT PAGE: NO HANDLER ANYWHERE AND THE ROOT LOGGER AT WARNING
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", [])
+    monkeypatch.setattr(root, "level", logging.WARNING)
+    monkeypatch.setattr(instrument.logger, "handlers", [])
+    monkeypatch.setattr(instrument.logger, "level", logging.NOTSET)
+    start_run("page", memory=False)
+    with stage("only"):
+        pass
+    finish_run()
+    lines = capsys.readouterr().err.splitlines()
+    assert [json.loads(line)["stage"] for line in lines] == ["only"]
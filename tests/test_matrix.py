@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.matrix import CellMatrix, anomalies, rolling_baseline, zscore
+
+
+def _values():
+    rng = np.random.default_rng(0)
+    values = rng.normal(100, 10, (4, 30))
+    values[1, 5:9] = np.nan       # A GAP: THE NEXT DAYS HAVE FEWER THAN window DAYS BEHIND THEM
+    values[2, ::3] = np.nan       # EVERY THIRD DAY MISSING
+    values[3, :] = np.nan         # NO DATA AT ALL
+    return values
+
+def _pandas_baseline(values, window, min_periods):
+    # THE window DAYS BEFORE EACH DAY, THE DAY ITSELF EXCLUDED
+    rolling = pd.DataFrame(values).T.shift(1).rolling(window, min_periods=max(min_periods, 2))
+    return rolling.mean().T.to_numpy(), rolling.std().T.to_numpy()
+
+@pytest.mark.parametrize("window, min_periods", [(7, 4), (5, 5), (3, 1)])
+def test_baseline_matches_pandas_rolling(window, min_periods):
+    values = _values()
+    expected_mean, expected_std = _pandas_baseline(values, window, min_periods)
+    mean, std = rolling_baseline(values, window, min_periods)
+    np.testing.assert_allclose(mean, expected_mean, rtol=1e-9)
+    known = ~np.isnan(expected_mean)
+    np.testing.assert_allclose(std[known], expected_std[known], rtol=1e-6)
+    z, _ = zscore(values, window, min_periods)
+    with np.errstate(invalid="ignore"):
+        expected_z = (values - expected_mean) / expected_std
+    np.testing.assert_allclose(z, expected_z, rtol=1e-6)
+
+def test_min_periods_edge():
+    values = np.arange(10, dtype=float)[None, :]
+    mean, _ = rolling_baseline(values, window=7, min_periods=4)
+    # DAY 4 IS THE FIRST WITH FOUR DAYS BEHIND IT
+    assert np.isnan(mean[0, :4]).all()
+    assert mean[0, 4] == pytest.approx(1.5)
+    assert mean[0, 9] == pytest.approx(np.mean(np.arange(2, 9)))
+
+def test_anomalies_flag_the_worst_day_in_the_worse_direction():
+    values = _values()
+    values[0, 20] = 200     # A SPIKE
+    values[2, 22] = 0       # A DROP
+    matrix = CellMatrix(pd.Index(["A", "B", "C", "D"], name="Cell"), pd.date_range("2023-01-01", periods=30),
+                        {"x": values})
+    higher = SimpleNamespace(key="x", evaluate=lambda columns: columns["x"], higher_is_worse=True)
+    lower = SimpleNamespace(key="x", evaluate=lambda columns: columns["x"], higher_is_worse=False)
+
+    flagged = anomalies(matrix, higher, "2023-01-10", "2023-01-30")
+    assert flagged["Cell"].tolist() == ["A"]
+    assert flagged["day"].tolist() == [pd.Timestamp("2023-01-21")]
+    assert flagged["z"].iloc[0] >= 3
+    flagged = anomalies(matrix, lower, "2023-01-10", "2023-01-30")
+    assert flagged["Cell"].tolist() == ["C"]
+    # OUTSIDE THE WINDOW NOTHING IS FLAGGED, rows LIMITS THE CELLS
+    assert anomalies(matrix, higher, "2023-01-10", "2023-01-20").empty
+    assert anomalies(matrix, higher, "2023-01-10", "2023-01-30", rows=np.array([1, 2])).empty
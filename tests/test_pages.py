@@ -0,0 +1,61 @@
+import os
+import tempfile
+from pathlib import Path
+
+import streamlit.testing.element_tree as element_tree
+from streamlit.testing.script_interactions import InteractiveScriptTests
+
+from benchmarks.generate_data import generate
+from dashboard.technology import TECH_2G, TECH_4G
+
+PAGES = Path(__file__).resolve().parents[1] / "pages"
+
+
+def _block_init(init):
+    # STREAMLIT 1.24's ElementTree CANNOT PARSE A PLAIN CONTAINER BLOCK (THE SIDEBAR'S), IT IS READ AS ONE
+    def patched(self, root, proto=None, type=None):
+        if proto is not None and proto.WhichOneof("type") is None:
+            return init(self, root, None, "container")
+        return init(self, root, proto, type)
+    return patched
+
+
+class CellNameTests(InteractiveScriptTests):
+    # THE PAGES RUN FROM A DIRECTORY HOLDING A SMALL SYNTHETIC EXPORT AT THE TECHNOLOGY'S file_path
+    def setUp(self):
+        super().setUp()
+        self.cwd = os.getcwd()
+        self.data_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.data_dir.name)
+        self.block_init = element_tree.Block.__init__
+        element_tree.Block.__init__ = _block_init(self.block_init)
+
+    def tearDown(self):
+        element_tree.Block.__init__ = self.block_init
+        os.chdir(self.cwd)
+        self.data_dir.cleanup()
+        super().tearDown()
+
+    def _removing_a_cell_keeps_the_others(self, tech, page, query):
+        generate(tech, 600, tech.file_path, days=6)
+        script = self.script_from_filename(str(PAGES / page))
+        tree = script.run(timeout=60)
+
+        def multiselect(label):
+            return next(widget for widget in tree.multiselect if widget.label == label)
+
+        search = next(widget for widget in tree.text_input if widget.label.startswith("Search"))
+        tree = search.input(query).run(timeout=60)
+        matches = multiselect("Matches")
+        tree = matches.select(matches.options[0]).run(timeout=60)
+        cells = multiselect("Cell Name").value
+        self.assertGreater(len(cells), 1)
+        tree = multiselect("Cell Name").unselect(cells[0]).run(timeout=60)
+        self.assertEqual(multiselect("Cell Name").value, cells[1:])
+        self.assertFalse(tree.exception)
+
+    def test_2g(self):
+        self._removing_a_cell_keeps_the_others(TECH_2G, "dashboard_2g.py", "site00000")
+
+    def test_4g(self):
+        self._removing_a_cell_keeps_the_others(TECH_4G, "dashboard_4g.py", "site00000")
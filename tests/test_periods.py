@@ -0,0 +1,83 @@
+import dataclasses
+
+import pandas as pd
+import pytest
+
+from benchmarks.generate_data import generate
+from dashboard.cube import GRANULARITIES, full_periods
+from dashboard.dataset import load_dataset
+from dashboard.filters import filter_rows
+from dashboard.kpi import DATE_COLUMN, aggregate, required_columns
+
+# 75 DAYS FROM 2023-01-01 (A SUNDAY): PARTIAL WEEKS AND MONTHS AT EITHER END OF A WINDOW, ENOUGH CELLS FOR A
+# CUBE OVER REGIONAL TO BE KEPT
+DAYS = 75
+ROWS = 100 * DAYS
+WINDOWS = {
+    "mid-week and mid-month ends": ("2023-01-04", "2023-03-08"),
+    "whole weeks and months": ("2023-01-02", "2023-02-26"),
+    "inside one week": ("2023-01-10", "2023-01-12"),
+    "month end to month end": ("2023-01-17", "2023-02-28"),
+}
+
+
+@pytest.fixture(scope="module")
+def datasets(tech, tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp(f"{tech.name}-periods")
+    export = generate(tech, ROWS, tmp_path / "export.csv", days=DAYS)
+    tech = dataclasses.replace(tech, cube_columns=("REGIONAL",))
+    cubed = load_dataset(tech, export, cache_dir=tmp_path / "pandas")
+    assert cubed.cube is not None
+    return {"cube": cubed, "rows": dataclasses.replace(cubed, cube=None),
+            "sqlite": load_dataset(tech, export, cache_dir=tmp_path / "sqlite", backend="sqlite")}
+
+def resampled(dataset, start, end, selections, freq):
+    # THE NAIVE WAY: DAILY SUMS OF THE MATCHING ROWS, RESAMPLED TO freq AND LABELLED BY THE PERIOD'S FIRST DAY,
+    # ROW COUNTS DIVIDED BY THE DAYS WITH DATA OF EACH PERIOD IN THE WINDOW
+    daily = aggregate(filter_rows(dataset.frame, start, end, selections), dataset.kpis)
+    levels = [name for name in daily.index.names if name != DATE_COLUMN]
+    table = daily.groupby([pd.Grouper(level=DATE_COLUMN, freq=freq), *levels], dropna=False).sum()
+    dates = pd.DatetimeIndex(table.index.get_level_values(DATE_COLUMN)).to_period(freq).start_time
+    table.index = pd.MultiIndex.from_arrays([dates, *[table.index.get_level_values(name) for name in levels]],
+                                           names=[DATE_COLUMN, *levels])
+    days = pd.Series(1, index=dataset.days[(dataset.days >= start) & (dataset.days <= end)]).resample(freq).sum()
+    days.index = days.index.to_period(freq).start_time
+    _, means, counts, _ = required_columns(dataset.kpis)
+    for col in counts:
+        if col not in means:
+            table["count", col] = table["count", col] / days.reindex(dates).to_numpy()
+    return table
+
+def _comparable(table, levels):
+    # THE CUBE KEEPS ITS OWN DIMENSIONS AS EXTRA LEVELS, derive SUMS THEM AWAY LIKE THIS
+    table = table.groupby(level=levels, dropna=False).sum()
+    table.index = pd.MultiIndex.from_frame(table.index.to_frame().astype(str))
+    return table.astype(float)
+
+@pytest.mark.parametrize("window", WINDOWS.values(), ids=WINDOWS.keys())
+@pytest.mark.parametrize("freq", [freq for freq in GRANULARITIES.values() if freq != "D"])
+@pytest.mark.parametrize("path", ["cube", "rows", "sqlite"])
+def test_periods_match_a_resample_of_the_rows(datasets, path, freq, window):
+    start, end = map(pd.Timestamp, window)
+    regional = datasets["rows"].frame["REGIONAL"].cat.categories[0]
+    for selections in ({}, {"REGIONAL": [regional]}):
+        expected = resampled(datasets["rows"], start, end, selections, freq)
+        actual = datasets[path].query(start, end, selections, freq)
+        if path == "cube":
+            assert datasets[path]._uses_cube(selections)
+        levels = list(expected.index.names)
+        pd.testing.assert_frame_equal(_comparable(actual, levels), _comparable(expected, levels), check_names=False)
+
+@pytest.mark.parametrize("window, freq, expected", [
+    (("2023-01-04", "2023-03-08"), "W-SUN", ("2023-01-09", "2023-03-05")),
+    (("2023-01-04", "2023-03-08"), "M", ("2023-02-01", "2023-02-28")),
+    (("2023-01-02", "2023-01-08"), "W-SUN", ("2023-01-02", "2023-01-08")),
+    (("2023-01-10", "2023-01-12"), "W-SUN", None),
+    (("2023-01-17", "2023-02-28"), "M", ("2023-02-01", "2023-02-28")),
+])
+def test_full_periods(window, freq, expected):
+    periods = full_periods(*window, freq)
+    if expected is None:
+        assert periods is None
+    else:
+        assert (periods[0].start_time, periods[1].end_time.normalize()) == tuple(map(pd.Timestamp, expected))
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from dashboard.dataset import load_dataset
+from dashboard.ranking import level_sums, rank_offenders, rankable, ranked_columns
+
+
+@pytest.mark.parametrize("min_denominator", [0, 40_000])
+@pytest.mark.parametrize("level", ["cell", "Cluster"])
+def test_offenders_match_a_naive_groupby(tech, export, tmp_path, level, min_denominator):
+    dataset = load_dataset(tech, export, cache_dir=tmp_path)
+    level = tech.cell_column if level == "cell" else level
+    columns = ranked_columns(dataset.kpis)
+    offenders = rank_offenders(level_sums(dataset.frame, level, columns), dataset.kpis, 5, min_denominator)
+
+    naive = dataset.frame.groupby(level, observed=True)[columns].sum()
+    assert list(offenders) == [kpi.key for kpi in rankable(dataset.kpis)]
+    for kpi in rankable(dataset.kpis):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = kpi.evaluate(naive).replace([np.inf, -np.inf], np.nan)
+        value = value[naive[list(kpi.denominator)].sum(axis=1) >= min_denominator].dropna()
+        expected = value.nlargest(5) if kpi.higher_is_worse else value.nsmallest(5)
+        table = offenders[kpi.key]
+        # TIES MAY LIST DIFFERENT CELLS, THE VALUES AND THEIR ORDER MUST AGREE
+        np.testing.assert_allclose(table[kpi.key].to_numpy(), expected.to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(table[kpi.key].to_numpy(), value[table[level]].to_numpy(), rtol=1e-9)
+        assert table.index.tolist() == list(range(1, len(expected) + 1))
@@ -0,0 +1,38 @@
+import json
+
+import pandas as pd
+
+from dashboard.dataset import load_dataset
+from dashboard.kpi import DATE_COLUMN, derive
+from dashboard.report import filter_sets, kpi_long_table, render_reports, report_name
+
+
+def test_filter_sets(tech, export, tmp_path):
+    dataset = load_dataset(tech, export, cache_dir=tmp_path / "cache")
+    regionals = dataset.option_index().categories["REGIONAL"].tolist()
+    assert filter_sets(dataset) == [{}]
+    assert filter_sets(dataset, by="REGIONAL") == [{"REGIONAL": [value]} for value in regionals]
+    path = tmp_path / "filters.json"
+    path.write_text(json.dumps([{"REGIONAL": regionals[:2]}, {"PROJECT": ["PROJECT_1"]}]))
+    assert filter_sets(dataset, filters_file=path) == [{"REGIONAL": regionals[:2]}, {"PROJECT": ["PROJECT_1"]}]
+
+def test_reports_match_the_queries(tech, export, tmp_path):
+    dataset = load_dataset(tech, export, cache_dir=tmp_path / "cache")
+    first, last = (day.date() for day in dataset.date_range())
+    regionals = dataset.option_index().categories["REGIONAL"].tolist()
+    selections_list = [{"REGIONAL": regionals[:1]}, {"REGIONAL": regionals[1:3]}]
+    results = render_reports(dataset, export, selections_list, formats=("csv", "html"), out_dir=tmp_path / "out",
+                             workers=1)
+
+    assert [name for name, _ in results] == [report_name(selections) for selections in selections_list]
+    for (name, written), selections in zip(results, selections_list):
+        assert sorted(path.suffix for path in written) == [".csv", ".html"]
+        kpi_tables = derive(dataset.query(first, last, selections), dataset.kpis)
+        expected = kpi_long_table(kpi_tables, dataset.kpis)
+        actual = pd.read_csv(tmp_path / "out" / f"{name}.csv", parse_dates=[DATE_COLUMN])
+        pd.testing.assert_frame_equal(actual.astype({"series": str}), expected.astype({"series": str}),
+                                      check_dtype=False)
+        html = (tmp_path / "out" / f"{name}.html").read_text(encoding="utf-8")
+        assert f"{dataset.tech.name} Dashboard: {name}" in html
+        assert all(kpi.title in html for kpi in dataset.kpis)
+    assert (tmp_path / "out" / "plotly.min.js").exists()
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from dashboard.results import ResultCache, cached_offenders
+
+
+def test_empty_results_are_evicted():
+    cache = ResultCache(max_bytes=10_000)
+    for i in range(100_000):
+        cache.put(("version", i, (("PROJECT", (f"P{i}",)),)), None)
+    assert 0 < cache.stats()["entries"] < 100
+    assert cache.bytes <= cache.max_bytes
+
+def test_least_recently_used_is_evicted_first():
+    table = {"kpi": pd.DataFrame({"value": range(100)})}
+    cache = ResultCache(max_bytes=3_500)
+    cache.put("a", table)
+    cache.put("b", table)
+    cache.get("a")
+    cache.put("c", table)
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.stats()["evictions"] == 1
+
+def test_offenders_share_the_bounded_cache():
+    calls = []
+
+    class Dataset:
+        version = "v1"
+
+        def offenders(self, *args):
+            calls.append(args)
+            return {"kpi": pd.DataFrame({"value": [1.0]})}
+
+    cache = ResultCache(max_bytes=10_000)
+    first = cached_offenders(cache, Dataset(), "2023-01-01", "2023-01-31", (("REGIONAL", ("R1",)),), "Cluster", 5, 100)
+    again = cached_offenders(cache, Dataset(), "2023-01-01", "2023-01-31", (("REGIONAL", ("R1",)),), "Cluster", 5, 100)
+    assert again is first and len(calls) == 1
+    cached_offenders(cache, Dataset(), "2023-01-01", "2023-01-31", (("REGIONAL", ("R1",)),), "BTS NAME", 5, 100)
+    assert len(calls) == 2
+    for i in range(1000):
+        cached_offenders(cache, Dataset(), "2023-01-01", "2023-01-31", (), "Cluster", 5, i)
+    assert cache.bytes <= cache.max_bytes
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.filters import build_option_index
+from dashboard.search import allowed_cells, build_cell_index, expand, search
+
+CELLS = pd.DataFrame({
+    "Cell Name": ["SITE000001_1", "SITE000001_2", "SITE000002_1", "SITE000012_1", "CELL_00042", np.nan],
+    "Cluster": ["CLUSTER_A", "CLUSTER_A", "CLUSTER_B", np.nan, "CLUSTER_B", "CLUSTER_A"],
+})
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_cell_index(build_option_index(CELLS, ["Cell Name", "Cluster"]), "Cell Name")
+
+def test_prefix_lists_the_site_before_its_cells(index):
+    assert search(index, "site000001") == ["SITE000001 (site, 2 cells)", "SITE000001_1", "SITE000001_2"]
+    assert search(index, "  Site000001_2 ") == ["SITE000001_2"]
+
+def test_substring_after_the_prefix_matches(index):
+    # "0001" STARTS NO NAME, IT IS FOUND INSIDE THE SITES AND CELLS BY TRIGRAMS, IN NAME ORDER
+    assert search(index, "0001") == ["SITE000001 (site, 2 cells)", "SITE000001_1", "SITE000001_2",
+                                     "SITE000012 (site, 1 cells)", "SITE000012_1"]
+    assert search(index, "l_000") == ["CELL_00042"]
+    assert search(index, "ster_b") == ["CLUSTER_B (cluster, 2 cells)"]
+    assert search(index, "0000_") == []
+
+def test_short_text_only_matches_prefixes(index):
+    assert search(index, "_1") == []
+    assert search(index, "ce") == ["CELL_00042"]
+    assert search(index, "") == []
+
+def test_limit(index):
+    assert search(index, "site", limit=2) == ["SITE000001 (site, 2 cells)", "SITE000001_1"]
+
+def test_a_cell_without_a_sector_has_no_site(index):
+    assert search(index, "cell_") == ["CELL_00042"]
+
+def test_sites_and_clusters_expand_to_their_cells(index):
+    assert expand(index, ["SITE000001 (site, 2 cells)"]) == ["SITE000001_1", "SITE000001_2"]
+    assert expand(index, ["CLUSTER_B (cluster, 2 cells)", "SITE000002_1"]) == ["CELL_00042", "SITE000002_1"]
+    assert expand(index, ["CLUSTER_A (cluster, 2 cells)", "gone"]) == ["SITE000001_1", "SITE000001_2"]
+    assert expand(index, []) == []
+
+def test_allowed_cells_hide_and_narrow(index):
+    allowed = allowed_cells(index, ["SITE000001_2", "CELL_00042", np.nan, "UNKNOWN"])
+    assert index.cells[allowed].tolist() == ["CELL_00042", "SITE000001_2"]
+    assert search(index, "site", allowed) == ["SITE000001 (site, 2 cells)", "SITE000001_2"]
+    assert search(index, "cluster", allowed) == ["CLUSTER_A (cluster, 2 cells)", "CLUSTER_B (cluster, 2 cells)"]
+    assert expand(index, ["CLUSTER_A (cluster, 2 cells)"], allowed) == ["SITE000001_2"]
+    assert search(index, "site000002", allowed) == []
@@ -0,0 +1,14 @@
+import pandas as pd
+
+from dashboard.dataset import load_dataset
+from dashboard.warmup import start_warm_up
+
+
+def test_warm_up_from_a_thread_fills_the_store(tech, export, tmp_path):
+    # LIKE THE HOME PAGE: THE POOL IS STARTED FROM A BACKGROUND THREAD, THE CHUNKS ARE CLEANED IN WORKERS
+    start_warm_up((tech,), sources={tech.name: export}, workers=2, chunk_bytes=export.stat().st_size // 3,
+                  cache_dir=tmp_path / "warm").join()
+    assert list((tmp_path / "warm").glob("*-manifest.json"))
+    warmed = load_dataset(tech, export, cache_dir=tmp_path / "warm")
+    serial = load_dataset(tech, export, cache_dir=tmp_path / "serial")
+    pd.testing.assert_frame_equal(warmed.frame, serial.frame)